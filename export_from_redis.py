@@ -1,66 +1,404 @@
+import asyncio
+import base64
+import io
+import multiprocessing
 import redis
+import redis.asyncio
 import json
+import math
+import os
+import re
+import shutil
 import sys
+import zlib
+from collections import namedtuple
+from redis.utils import HIREDIS_AVAILABLE
 
-# Connection to Redis in Docker (localhost from host)
-r = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+# A +inf/-inf zset score; orjson would write it as null, so dumps() hands it to json (Infinity)
+class NonFiniteScore(float):
+    pass
 
-def serialize_redis_value(key, key_type):
-    """Serializes Redis value to Python object for JSON (direct format)."""
-    if key_type == 'string':
-        return r.get(key) or ''
-    elif key_type == 'hash':
-        return dict(r.hgetall(key))
-    elif key_type == 'list':
-        return r.lrange(key, 0, -1)
-    elif key_type == 'set':
-        return sorted(list(r.smembers(key)))  # Sorted for stability
-    elif key_type == 'zset':
-        return dict(r.zrange(key, 0, -1, withscores=True))  # {member: score}
+try:
+    import orjson
+
+    def dumps(obj):
+        """Serializes obj to indented UTF-8 JSON bytes."""
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Only a NonFiniteScore gets here: orjson rejects float subclasses
+            return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+except ImportError:
+    # orjson is optional, the standard library produces the same layout (only slower)
+    def dumps(obj):
+        """Serializes obj to indented UTF-8 JSON bytes."""
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+# SCAN COUNT hint and pipeline size; the server treats COUNT as a hint, so large values are safe
+SCAN_COUNT = int(os.environ.get("SCAN_COUNT", "5000"))
+# Elements per read of a hash/list/set/zset/stream; bigger ones are paged while they are written
+PAGE_SIZE = int(os.environ.get("PAGE_SIZE", "5000"))
+# Batches fetched concurrently (pipelines in flight) while earlier ones are written
+EXPORT_WORKERS = int(os.environ.get("EXPORT_WORKERS", "16"))
+# Processes exporting disjoint key shards, for when JSON encoding is the bottleneck
+EXPORT_PROCESSES = int(os.environ.get("EXPORT_PROCESSES", "1"))
+# Seconds between progress lines
+PROGRESS_INTERVAL = 1
+# Output buffer; many small per-item writes are coalesced into few large write() calls
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Unix socket path of a local server; skips the TCP/IP stack entirely
+REDIS_SOCKET = os.environ.get("REDIS_SOCKET")
+
+# Connection to Redis in Docker (localhost from host). The asyncio client is shared by
+# all fetch tasks, every pipeline checks out its own connection from the pool: at most
+# EXPORT_WORKERS + 2 pipelines, plus SCAN and paging of one big value.
+# Replies stay bytes: only values that end up in the JSON get decoded, once.
+# redis-py already sets TCP_NODELAY; reading replies 1 MiB per recv() cuts syscalls
+# on bulk replies. RESP3 (redis-py 5+, Redis 6+) sends scores as typed doubles and
+# lets hiredis build the reply containers, instead of regrouping flat RESP2 arrays.
+connection_kwargs = dict(db=0, protocol=3, decode_responses=False, max_connections=EXPORT_WORKERS + 4,
+                         socket_read_size=1 << 20, socket_connect_timeout=5, health_check_interval=0)
+if REDIS_SOCKET:
+    pool = redis.asyncio.ConnectionPool(connection_class=redis.asyncio.UnixDomainSocketConnection,
+                                        path=REDIS_SOCKET, **connection_kwargs)
+else:
+    pool = redis.asyncio.ConnectionPool(host='localhost', port=6379, socket_keepalive=True, **connection_kwargs)
+r = redis.asyncio.Redis(connection_pool=pool)
+
+# Read command per type. Keys come from SCAN ... TYPE <type> (Redis 6+), so the type
+# is known up front and every key costs exactly one pipelined command. Aggregates only
+# return their first page here, so one huge key can't blow up a pipeline reply.
+READERS = {
+    'string': lambda pipe, key: pipe.get(key),
+    'hash': lambda pipe, key: pipe.hscan(key, 0, count=PAGE_SIZE),
+    'list': lambda pipe, key: pipe.lrange(key, 0, PAGE_SIZE - 1),
+    'set': lambda pipe, key: pipe.sscan(key, 0, count=PAGE_SIZE),
+    'zset': lambda pipe, key: pipe.zrange(key, 0, PAGE_SIZE - 1, withscores=True),
+    'stream': lambda pipe, key: pipe.xrange(key, '-', '+', count=PAGE_SIZE),
+}
+
+def decode_value(value):
+    """Decodes a reply to str; values that are not valid UTF-8 are base64-encoded."""
+    try:
+        return value.decode('utf-8')
+    except UnicodeDecodeError:
+        return base64.b64encode(value).decode('ascii')
+
+# Bytes that JSON strings must escape; ASCII without them is valid JSON string content as is
+JSON_ESCAPED = re.compile(rb'[\x00-\x1f"\\]')
+
+def is_plain_ascii(value):
+    """Tells whether value can be written between double quotes without decoding or escaping."""
+    return value.isascii() and not JSON_ESCAPED.search(value)
+
+# A '"key": "value"' output member pre-encoded from plain ASCII reply bytes
+class JSONMember(bytes):
+    pass
+
+# An aggregate bigger than one page; items are fetched while the value is being written
+PagedValue = namedtuple('PagedValue', 'is_mapping items')
+
+def is_last_page(key_type, reply):
+    """Tells whether a hash/list/set/zset/stream reply already holds the whole collection."""
+    if key_type in ('hash', 'set'):
+        return reply[0] == 0  # HSCAN/SSCAN cursor
+    return len(reply) < PAGE_SIZE
+
+def next_stream_id(entry_id):
+    """Returns the smallest stream ID after entry_id, for an exclusive XRANGE start."""
+    ms, seq = entry_id.split(b'-')
+    return b'%s-%d' % (ms, int(seq) + 1)
+
+async def iter_pages(key, key_type, first_reply):
+    """Yields raw pages of a hash/list/set/zset/stream, starting with the reply of READERS."""
+    if key_type in ('hash', 'set'):
+        # HSCAN/SSCAN may repeat an element if the key is rehashed while paging
+        scan = r.hscan if key_type == 'hash' else r.sscan
+        cursor, page = first_reply
+        yield page
+        while cursor:
+            cursor, page = await scan(key, cursor, count=PAGE_SIZE)
+            yield page
     elif key_type == 'stream':
-        entries = r.xread({key: '0'}, block=0, count=10000)
-        if entries:
-            return [[entry_id, dict(fields)] for _, entries_list in entries for entry_id, fields in entries_list]
-        return []
+        # XRANGE windows: continue right after the last ID, never blocks
+        page = first_reply
+        yield page
+        while len(page) == PAGE_SIZE:
+            page = await r.xrange(key, next_stream_id(page[-1][0]), '+', count=PAGE_SIZE)
+            yield page
     else:
-        # Fallback for other types (module, bitmap, etc.) — as string with type
-        raw_value = r.dump(key)
-        return f"{key_type}: (binary data, size {len(raw_value) if raw_value else 0} bytes)"
+        # Index windows keep list order and zset score order
+        start, page = 0, first_reply
+        yield page
+        while len(page) == PAGE_SIZE:
+            start += PAGE_SIZE
+            if key_type == 'list':
+                page = await r.lrange(key, start, start + PAGE_SIZE - 1)
+            else:
+                page = await r.zrange(key, start, start + PAGE_SIZE - 1, withscores=True)
+            yield page
 
-    return None  # Should not reach
+# Decoder per aggregate type, from one raw page to its items; (field, value) pairs for hash and zset
+PAGE_DECODERS = {
+    'hash': lambda page: ((decode_value(field), decode_value(value)) for field, value in page.items()),
+    'list': lambda page: map(decode_value, page),
+    'set': lambda page: map(decode_value, page),
+    'zset': lambda page: ((decode_value(member), score if math.isfinite(score) else NonFiniteScore(score))
+                          for member, score in page),  # {member: score}
+    'stream': lambda page: ([entry_id.decode('ascii'), {decode_value(field): decode_value(value) for field, value in fields.items()}]
+                            for entry_id, fields in page),
+}
 
-def export_to_json(output_file):
-    """Exports all keys to JSON file (direct format)."""
-    data = {}
-    cursor = 0
-    processed = 0
+async def iter_items(key, key_type, first_reply):
+    """Yields decoded items of a hash/list/set/zset/stream; (field, value) pairs for hash and zset."""
+    decode = PAGE_DECODERS[key_type]
+    async for page in iter_pages(key, key_type, first_reply):
+        for item in decode(page):
+            yield item
+
+async def serialize_redis_value(key, key_type, raw_value, stable_sets=False):
+    """Serializes reply of READERS[key_type] to Python object for JSON (direct format)."""
+    if key_type == 'string':
+        return decode_value(raw_value) if raw_value else ''
+    elif key_type in PAGE_DECODERS:
+        is_mapping = key_type in ('hash', 'zset')
+        items = iter_items(key, key_type, raw_value)
+        sort = stable_sets and key_type == 'set'  # Only when asked, sorting huge sets is expensive
+        if not is_last_page(key_type, raw_value) and not sort:
+            return PagedValue(is_mapping, items)
+        items = [item async for item in items]
+        if is_mapping:
+            return dict(items)
+        return sorted(items) if sort else items
+    else:
+        # Fallback for other types (module, etc.) — as string with type. raw_value is
+        # MEMORY USAGE, so nothing is serialized or sent for this.
+        return f"{key_type}: (binary data, ~{raw_value or 0} bytes)"
+
+async def fetch_batch(keys, key_type, stable_sets=False):
+    """Fetches values for one SCAN batch of a single type in one pipelined round-trip."""
+    read = READERS[key_type]
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        read(pipe, key)
+
+    batch = []
+    for key, raw_value in zip(keys, await pipe.execute(raise_on_error=False)):
+        if isinstance(raw_value, redis.exceptions.ResponseError):
+            continue  # WRONGTYPE: the key was replaced by another type after SCAN
+        if key_type == 'string' and raw_value is not None and is_plain_ascii(key) and is_plain_ascii(raw_value):
+            # Common case (IDs, numbers, JSON-free text): copy the bytes, no decode and re-encode
+            value = JSONMember(b'"%s": "%s"' % (key, raw_value))
+        else:
+            value = await serialize_redis_value(key, key_type, raw_value, stable_sets)
+        # Binary key names stay readable (and distinct) as \xNN escapes
+        batch.append((key.decode('utf-8', 'backslashreplace'), value))
+    return batch
+
+async def fetch_other_batch(keys):
+    """Reports keys of non-core (module) types from an untyped SCAN batch."""
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.type(key)
+    key_types = [(key, key_type.decode('ascii')) for key, key_type in zip(keys, await pipe.execute())]
+    # 'none' means the key expired or was deleted after SCAN
+    others = [(key, key_type) for key, key_type in key_types if key_type not in READERS and key_type != 'none']
+    if not others:
+        return []
+
+    pipe = r.pipeline(transaction=False)
+    for key, _ in others:
+        pipe.memory_usage(key)
+    return [(key.decode('utf-8', 'backslashreplace'), await serialize_redis_value(key, key_type, size))
+            for (key, key_type), size in zip(others, await pipe.execute())]
+
+async def iter_key_batches(key_type=None, shard=None):
+    """Yields scanned keys (of key_type, if given) in batches of at most SCAN_COUNT.
+
+    shard=(index, count) keeps only the keys with crc32(key) % count == index.
+    """
+    batch = []
+    async for key in r.scan_iter(count=SCAN_COUNT, _type=key_type):
+        # crc32, not hash(): it has to agree across processes
+        if shard and zlib.crc32(key) % shard[1] != shard[0]:
+            continue
+        batch.append(key)
+        if len(batch) == SCAN_COUNT:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def iter_fetch_jobs(stable_sets=False, shard=None):
+    """Yields (coroutine function, args) fetching every key: one typed SCAN pass per core type."""
+    for key_type in READERS:
+        async for keys in iter_key_batches(key_type, shard):
+            yield fetch_batch, (keys, key_type, stable_sets)
+    # Only modules add types beyond READERS; skip the TYPE pass when none are loaded
+    if await r.module_list():
+        async for keys in iter_key_batches(shard=shard):
+            yield fetch_other_batch, (keys,)
+
+async def iter_fetched_batches(stable_sets=False, shard=None):
+    """Fetches SCAN batches concurrently, yielding them in SCAN order.
+
+    A producer task keeps SCAN and up to EXPORT_WORKERS pipelined fetches in flight
+    while the caller encodes and writes the batches before them.
+    """
+    # Bounded, so SCAN can't run far ahead of the writer
+    tasks = asyncio.Queue(maxsize=EXPORT_WORKERS)
+
+    async def produce():
+        try:
+            async for fetch, args in iter_fetch_jobs(stable_sets, shard):
+                await tasks.put(asyncio.create_task(fetch(*args)))
+        except Exception:
+            await tasks.put(None)  # Stop the consumer, which then gets the error from the producer
+            raise
+        await tasks.put(None)
+
+    producer = asyncio.create_task(produce())
     while True:
-        cursor, keys = r.scan(cursor=cursor, count=100)
-        for key in keys:
-            key_str = key.decode('utf-8') if isinstance(key, bytes) else key
-            key_type_obj = r.type(key)
-            key_type = key_type_obj.decode('utf-8') if isinstance(key_type_obj, bytes) else key_type_obj
-            value = serialize_redis_value(key_str, key_type)
-            data[key_str] = value  # Direct value — no wrapper!
-            processed += 1
-            if processed % 1000 == 0:
-                print(f"Processed keys: {processed}")
-
-        if cursor == 0:
+        task = await tasks.get()
+        if task is None:
             break
+        yield await task
+    await producer
+
+async def write_paged_value(f, value):
+    """Writes a PagedValue item by item, in the layout json.dump(..., indent=2) would use."""
+    f.write(b'{' if value.is_mapping else b'[')
+    count = 0
+    async for item in value.items:
+        f.write(b',\n    ' if count else b'\n    ')
+        if value.is_mapping:
+            field, item = item
+            f.write(dumps(field))
+            f.write(b': ')
+        f.write(dumps(item).replace(b'\n', b'\n    '))
+        count += 1
+    if count:
+        f.write(b'\n  ')
+    f.write(b'}' if value.is_mapping else b']')
 
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def open_output(path):
+    """Opens path for writing JSON bytes through a WRITE_BUFFER_SIZE BufferedWriter."""
+    # No text layer: dumps() already returns UTF-8 bytes
+    return io.BufferedWriter(io.FileIO(path, 'w'), buffer_size=WRITE_BUFFER_SIZE)
 
-    print(f"Export completed. Processed {len(data)} keys. Data saved to {output_file}")
+async def write_members(f, stable_sets=False, shard=None):
+    """Writes the "key": value members of the output object (no braces); returns the key count."""
+    seen = set()  # SCAN may return a key more than once
+    processed = 0
+
+    async def report_progress():
+        # Runs on the event loop while the writer awaits fetches; nothing is printed per batch
+        reported = 0
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            if processed != reported:
+                reported = processed
+                print(f"Processed keys: {processed}" + (f" (shard {shard[0]})" if shard else ""))
+
+    reporter = asyncio.create_task(report_progress())
+    try:
+        async for batch in iter_fetched_batches(stable_sets, shard):
+            chunk = {}
+            members = []
+            paged = []
+            for key_str, value in batch:
+                if key_str in seen:
+                    continue
+                seen.add(key_str)
+                if isinstance(value, PagedValue):
+                    paged.append((key_str, value))
+                elif isinstance(value, JSONMember):
+                    members.append(value)
+                else:
+                    chunk[key_str] = value  # Direct value — no wrapper!
+            count = len(members) + len(chunk)
+            if chunk:
+                # One dumps call per batch: strip its braces and splice it into the output
+                # object, giving the same layout as json.dump(data, f, indent=2)
+                members.append(dumps(chunk)[4:-2])
+            if members:
+                f.write(b',\n  ' if processed else b'\n  ')
+                f.write(b',\n  '.join(members))
+                processed += count
+            for key_str, value in paged:
+                f.write(b',\n  ' if processed else b'\n  ')
+                f.write(dumps(key_str))
+                f.write(b': ')
+                await write_paged_value(f, value)
+                processed += 1
+    finally:
+        reporter.cancel()
+    return processed
+
+async def write_output(path, stable_sets=False, shard=None):
+    """Writes the keys (of shard, if given) to path; a shard gets its members only, no braces."""
+    try:
+        with open_output(path) as f:
+            if shard:
+                return await write_members(f, stable_sets, shard)
+            f.write(b'{')
+            processed = await write_members(f, stable_sets)
+            f.write(b'\n}' if processed else b'}')
+            return processed
+    finally:
+        # Connections belong to this event loop, close them before asyncio.run() closes it
+        await pool.disconnect()
+
+def export_shard(shard_file, index, stable_sets=False):
+    """Worker process: writes the members of one key shard to shard_file; returns the key count."""
+    return asyncio.run(write_output(shard_file, stable_sets, (index, EXPORT_PROCESSES)))
+
+def export_sharded(output_file, stable_sets=False):
+    """Exports with EXPORT_PROCESSES worker processes, then joins their shards; returns the key count."""
+    shard_files = [f"{output_file}.shard{index}" for index in range(EXPORT_PROCESSES)]
+    # One shard per process: each one runs its own event loop on a fresh connection pool
+    with multiprocessing.Pool(EXPORT_PROCESSES, maxtasksperchild=1) as workers:
+        counts = workers.starmap(export_shard, [(shard_file, index, stable_sets)
+                                                for index, shard_file in enumerate(shard_files)])
+
+    processed = 0
+    with open_output(output_file) as f:
+        f.write(b'{')
+        for shard_file, count in zip(shard_files, counts):
+            if count:
+                if processed:
+                    f.write(b',')
+                with open(shard_file, 'rb') as shard:
+                    shutil.copyfileobj(shard, f, WRITE_BUFFER_SIZE)
+                processed += count
+            os.remove(shard_file)
+        f.write(b'\n}' if processed else b'}')
+    return processed
+
+def export_to_json(output_file, stable_sets=False):
+    """Exports all keys to JSON file (direct format), writing each batch as soon as it is read."""
+    if EXPORT_PROCESSES > 1:
+        processed = export_sharded(output_file, stable_sets)
+    else:
+        processed = asyncio.run(write_output(output_file, stable_sets))
+
+    print(f"Export completed. Processed {processed} keys. Data saved to {output_file}")
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python3 export_from_redis.py <output_file.json>")
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) != 1:
+        print("Usage: python3 export_from_redis.py <output_file.json> [options]")
+        print("\nOptions:")
+        print("  --stable-sets    Sort set members (stable output for diffs, slower on big sets)")
         sys.exit(1)
 
+    if not HIREDIS_AVAILABLE:
+        # redis-py picks the C parser automatically once hiredis is installed
+        print("Tip: pip install hiredis for much faster parsing of large hashes/lists/sets")
+
     try:
-        export_to_json(sys.argv[1])
+        export_to_json(args[0], stable_sets="--stable-sets" in sys.argv)
     except redis.exceptions.ConnectionError as e:
         print(f"Redis connection error: {e}. Check if the Docker container is running.")
         sys.exit(1)
@@ -0,0 +1,333 @@
+"""
+Numba kernels for the hot scans of rdb_parser (optional).
+Requires numpy and numba; rdb_parser falls back to pure Python without them.
+
+A ziplist/listpack scan walks the entry headers of one blob and returns, per
+entry, its kind and either an integer value or the (offset, length) of its
+string bytes, so Python only has to decode the strings. The record scan does
+the same for runs of top-level string keys in the RDB file itself.
+"""
+
+import numpy as np
+from numba import njit
+
+# Entry kinds returned by the scans
+ENTRY_STRING = 0  # value is the offset of length bytes in the blob
+ENTRY_INT = 1     # value is the integer
+ENTRY_UNKNOWN = 2 # value is the unrecognized encoding byte
+ENTRY_LZF = 3     # value is the offset of length compressed bytes, size the uncompressed length
+
+# Records per scan_string_records call
+RECORD_BATCH = 4096
+
+@njit(cache=True)
+def _read_int(buf, start, width, signed):
+    """Little-endian integer of width bytes at start"""
+    value = np.int64(0)
+    for k in range(width):
+        value |= np.int64(buf[start + k]) << (8 * k)
+    if signed and width < 8 and value & (np.int64(1) << (8 * width - 1)):
+        value -= np.int64(1) << (8 * width)
+    return value
+
+@njit(cache=True)
+def _scan_ziplist(buf, count, exact):
+    n = buf.shape[0]
+    # Every entry takes at least one byte
+    cap = min(count, n)
+    kinds = np.empty(cap, np.uint8)
+    values = np.empty(cap, np.int64)
+    lengths = np.zeros(cap, np.int64)
+    found = 0
+    pos = 10
+    for _ in range(count):
+        # An exact count needs no end marker check
+        if not exact and (pos >= n - 1 or buf[pos] == 0xFF):
+            break
+        rest = n - pos
+        if rest < 2:
+            break
+
+        # Previous entry length (1 or 5 bytes)
+        offset = 1
+        if buf[pos] == 0xFE:
+            if rest < 5:
+                break
+            offset = 5
+        if offset >= rest:
+            break
+
+        encoding = np.int64(buf[pos + offset])
+        offset += 1
+        kind = ENTRY_INT
+        value = np.int64(0)
+        length = np.int64(0)
+
+        if (encoding & 0xC0) == 0x00 or (encoding & 0xC0) == 0x40 or (encoding & 0xC0) == 0x80:
+            # 6-bit, 14-bit or 32-bit string length
+            if (encoding & 0xC0) == 0x00:
+                length = encoding & 0x3F
+            elif (encoding & 0xC0) == 0x40:
+                if offset >= rest:
+                    break
+                length = ((encoding & 0x3F) << 8) | np.int64(buf[pos + offset])
+                offset += 1
+            else:
+                if offset + 4 > rest:
+                    break
+                length = _read_int(buf, pos + offset, 4, False)
+                offset += 4
+            if offset + length > rest:
+                break
+            kind = ENTRY_STRING
+            value = pos + offset
+            offset += length
+        elif encoding == 0xC0 or encoding == 0xD0 or encoding == 0xE0 or encoding == 0xF0 or encoding == 0xFE:
+            # 16, 32, 64, 24 and 8-bit integers
+            if encoding == 0xC0:
+                width = 2
+            elif encoding == 0xD0:
+                width = 4
+            elif encoding == 0xE0:
+                width = 8
+            elif encoding == 0xF0:
+                width = 3
+            else:
+                width = 1
+            if offset + width > rest:
+                break
+            value = _read_int(buf, pos + offset, width, True)
+            offset += width
+        elif (encoding & 0xF0) == 0xF0:
+            # 4-bit immediate integer (1111xxxx)
+            value = (encoding & 0x0F) - 1
+        else:
+            kind = ENTRY_UNKNOWN
+            value = encoding
+            offset = 1
+
+        kinds[found] = kind
+        values[found] = value
+        lengths[found] = length
+        found += 1
+        pos += offset
+    return kinds[:found], values[:found], lengths[:found]
+
+@njit(cache=True)
+def _scan_listpack(buf, count):
+    n = buf.shape[0]
+    cap = min(count, n)
+    kinds = np.empty(cap, np.uint8)
+    values = np.empty(cap, np.int64)
+    lengths = np.zeros(cap, np.int64)
+    found = 0
+    pos = 6
+    for _ in range(count):
+        if pos >= n - 1:
+            break
+        rest = n - pos
+        byte = np.int64(buf[pos])
+        kind = ENTRY_INT
+        value = np.int64(0)
+        length = np.int64(0)
+
+        if byte <= 0x7F or (byte & 0xC0) == 0x80:
+            # 7-bit or 12-bit string length, followed by the backlen byte
+            if byte <= 0x7F:
+                length = byte
+                header = 1
+            else:
+                length = ((byte & 0x3F) << 8) | np.int64(buf[pos + 1])
+                header = 2
+            if rest < header + length + 1:
+                break
+            kind = ENTRY_STRING
+            value = pos + header
+            size = header + length + 1
+        elif (byte & 0xE0) == 0xC0:
+            # 6-bit integer
+            value = byte & 0x1F
+            size = 2
+        elif (byte & 0xF0) == 0xE0:
+            # 13-bit integer
+            if rest < 3:
+                break
+            value = ((byte & 0x0F) << 8) | np.int64(buf[pos + 1])
+            if value & 0x800:
+                value -= 0x1000
+            size = 3
+        else:
+            enc = byte & 0x0F
+            if enc == 0x01 or enc == 0x02 or enc == 0x03 or enc == 0x04:
+                # 16, 24, 32 and 64-bit integers
+                if enc == 0x01:
+                    width = 2
+                elif enc == 0x02:
+                    width = 3
+                elif enc == 0x03:
+                    width = 4
+                else:
+                    width = 8
+                if rest < width + 2:
+                    break
+                value = _read_int(buf, pos + 1, width, True)
+                size = width + 2
+            elif enc == 0x00:
+                # 32-bit string length
+                if rest < 5:
+                    break
+                length = _read_int(buf, pos + 1, 4, False)
+                if rest < 5 + length + 1:
+                    break
+                kind = ENTRY_STRING
+                value = pos + 5
+                size = 5 + length + 1
+            else:
+                kind = ENTRY_UNKNOWN
+                value = byte
+                size = 1
+
+        kinds[found] = kind
+        values[found] = value
+        lengths[found] = length
+        found += 1
+        pos += size
+    return kinds[:found], values[:found], lengths[:found]
+
+@njit(cache=True)
+def _read_length(buf, pos):
+    """RDB length at pos: (length or special encoding, is_encoded, next pos); next pos is -1 past the end"""
+    n = buf.shape[0]
+    if pos >= n:
+        return np.int64(0), False, np.int64(-1)
+    byte = np.int64(buf[pos])
+    if byte >> 6 == 3:
+        return byte & 0x3F, True, pos + 1
+    if byte >> 6 == 0:
+        return byte & 0x3F, False, pos + 1
+    if byte >> 6 == 1:
+        if pos + 2 > n:
+            return np.int64(0), False, np.int64(-1)
+        return ((byte & 0x3F) << 8) | np.int64(buf[pos + 1]), False, pos + 2
+    # 10000001 is a 64-bit length, every other 10xxxxxx a 32-bit one (little-endian, as read_unsigned_int)
+    width = 8 if (byte & 0x3F) == 1 else 4
+    if pos + 1 + width > n:
+        return np.int64(0), False, np.int64(-1)
+    return _read_int(buf, pos + 1, width, False), False, pos + 1 + width
+
+@njit(cache=True)
+def _scan_string(buf, pos):
+    """RDB string at pos: (kind, value, size, uncompressed size, next pos); next pos is -1 if unsupported"""
+    n = buf.shape[0]
+    zero = np.int64(0)
+    length, encoded, pos = _read_length(buf, pos)
+    if pos < 0:
+        return ENTRY_UNKNOWN, zero, zero, zero, np.int64(-1)
+    if not encoded:
+        if length < 0 or pos + length > n:
+            return ENTRY_UNKNOWN, zero, zero, zero, np.int64(-1)
+        return ENTRY_STRING, pos, length, zero, pos + length
+    if length == 0 or length == 1 or length == 2:
+        # 8, 16 and 32-bit integers
+        width = 1 if length == 0 else (2 if length == 1 else 4)
+        if pos + width > n:
+            return ENTRY_UNKNOWN, zero, zero, zero, np.int64(-1)
+        return ENTRY_INT, _read_int(buf, pos, width, True), zero, zero, pos + width
+    if length == 3:
+        compressed, encoded, pos = _read_length(buf, pos)
+        if pos < 0 or encoded or compressed < 0:
+            return ENTRY_UNKNOWN, zero, zero, zero, np.int64(-1)
+        uncompressed, encoded, pos = _read_length(buf, pos)
+        if pos < 0 or encoded or uncompressed < 0 or pos + compressed > n:
+            return ENTRY_UNKNOWN, zero, zero, zero, np.int64(-1)
+        return ENTRY_LZF, pos, compressed, uncompressed, pos + compressed
+    return ENTRY_UNKNOWN, zero, zero, zero, np.int64(-1)
+
+@njit(cache=True)
+def _scan_string_records(buf, pos, expiry, idle, freq, limit):
+    n = buf.shape[0]
+    # Per record: key and value as (kind, value, size, uncompressed size), then expiry/idle/freq (-1 = none)
+    fields = np.empty((limit, 11), np.int64)
+    found = 0
+    end = pos
+    while found < limit and pos < n:
+        opcode = buf[pos]
+        if opcode == 0xFC:
+            # EXPIRETIME_MS
+            if pos + 9 > n:
+                break
+            expiry = _read_int(buf, pos + 1, 8, False)
+            if expiry < 0:
+                break
+            pos += 9
+            continue
+        if opcode == 0xFD:
+            # EXPIRETIME
+            if pos + 5 > n:
+                break
+            expiry = _read_int(buf, pos + 1, 4, False) * 1000
+            pos += 5
+            continue
+        if opcode == 0xF8:
+            # IDLE
+            idle, encoded, next_pos = _read_length(buf, pos + 1)
+            if next_pos < 0 or encoded or idle < 0:
+                break
+            pos = next_pos
+            continue
+        if opcode == 0xF9:
+            # FREQ
+            if pos + 2 > n:
+                break
+            freq = np.int64(buf[pos + 1])
+            pos += 2
+            continue
+        if opcode != 0:
+            # Not a string key: the caller reads it, with any metadata after end
+            break
+
+        key_kind, key_value, key_size, key_full, next_pos = _scan_string(buf, pos + 1)
+        if next_pos < 0:
+            break
+        kind, value, size, full, next_pos = _scan_string(buf, next_pos)
+        if next_pos < 0:
+            break
+        row = fields[found]
+        row[0] = key_kind
+        row[1] = key_value
+        row[2] = key_size
+        row[3] = key_full
+        row[4] = kind
+        row[5] = value
+        row[6] = size
+        row[7] = full
+        row[8] = expiry
+        row[9] = idle
+        row[10] = freq
+        expiry = idle = freq = -1
+        found += 1
+        pos = end = next_pos
+    return fields[:found], end
+
+def scan_string_records(data, pos, expiry=None, idle=None, freq=None):
+    """Scan the run of string keys starting at pos, up to RECORD_BATCH of them
+    expiry/idle/freq are the metadata already read for the first key. Returns
+    (end, records): end is the position after the last complete record and each
+    record is (key kind, value, size, uncompressed size, the same four for the
+    value, expiry, idle, freq) with -1 for absent metadata.
+    """
+    fields, end = _scan_string_records(
+        np.frombuffer(data, dtype=np.uint8), pos,
+        -1 if expiry is None else expiry, -1 if idle is None else idle, -1 if freq is None else freq,
+        RECORD_BATCH)
+    return end, fields.tolist()
+
+def scan_ziplist(data, count, exact=True):
+    """Scan up to count ziplist entries; returns (kinds, values, lengths) lists"""
+    kinds, values, lengths = _scan_ziplist(np.frombuffer(data, dtype=np.uint8), count, exact)
+    return kinds.tolist(), values.tolist(), lengths.tolist()
+
+def scan_listpack(data, count):
+    """Scan up to count listpack entries; returns (kinds, values, lengths) lists"""
+    kinds, values, lengths = _scan_listpack(np.frombuffer(data, dtype=np.uint8), count)
+    return kinds.tolist(), values.tolist(), lengths.tolist()
@@ -4,12 +4,130 @@ RDB (Redis Database) file parser that converts to JSON.
 Supports RDB version 12 (Redis 7.x)
 """
 
+import mmap
+import multiprocessing
+import os
 import struct
 import json
+import collections
+import contextlib
+from array import array
+import functools
+import gzip
+import io
+import itertools
+import math
 import sys
+import traceback
 import zlib
 from datetime import datetime
 
+try:
+    # LZF is not in standard library; resolved once, not per compressed string
+    from lzf import decompress as _lzf_decompress
+except ImportError:
+    _lzf_decompress = None
+
+# Placeholders read_string returns for keys it could not decode
+BAD_KEY_PREFIXES = ('<unknown', '<binary', '<parse_error', '<invalid')
+
+@functools.lru_cache(maxsize=4096)
+def _isoformat_seconds(seconds):
+    """Local-time ISO string of a whole-second Unix timestamp (cached, TTLs tend to cluster)"""
+    return datetime.fromtimestamp(seconds).isoformat()
+
+# isoformat()'s microsecond suffix for each whole millisecond ("" for none)
+_MS_SUFFIXES = [""] + [f".{ms:03d}000" for ms in range(1, 1000)]
+
+def expiry_isoformat(expiry_ms):
+    """datetime.fromtimestamp(expiry_ms / 1000).isoformat(), formatting each second only once"""
+    seconds, ms = divmod(expiry_ms, 1000)
+    return _isoformat_seconds(seconds) + _MS_SUFFIXES[ms]
+
+def lzf_decompress_python(data, expected_length):
+    """Pure-Python LZF decompression, used when python-lzf is not installed
+    The output size is known up front, so it is written into one preallocated bytearray.
+    """
+    out = bytearray(expected_length)
+    ip = op = 0
+    end = len(data)
+    while ip < end:
+        ctrl = data[ip]
+        ip += 1
+        if ctrl < 32:
+            # Literal run of ctrl + 1 bytes
+            length = ctrl + 1
+            if ip + length > end or op + length > expected_length:
+                raise ValueError("Corrupt LZF literal run")
+            out[op:op + length] = data[ip:ip + length]
+            ip += length
+        else:
+            # Back reference: length - 2 in the top 3 bits (7 = extended), offset - 1 in the rest
+            length = ctrl >> 5
+            if length == 7:
+                length += data[ip]
+                ip += 1
+            ref = op - ((ctrl & 0x1F) << 8) - data[ip] - 1
+            ip += 1
+            length += 2
+            if ref < 0 or op + length > expected_length:
+                raise ValueError("Corrupt LZF back reference")
+            if ref + length <= op:
+                out[op:op + length] = out[ref:ref + length]
+            else:
+                # Overlapping copy repeats the bytes just written, one at a time
+                for i in range(length):
+                    out[op + i] = out[ref + i]
+        op += length
+    del out[op:]
+    return out
+
+# Non-finite zset score; orjson would write it as null, so dumps() hands it to json (Infinity/NaN)
+class NonFiniteFloat(float):
+    pass
+
+try:
+    import orjson
+
+    def dumps(value, pretty=False):
+        """UTF-8 JSON bytes of value, indented by 2 when pretty"""
+        try:
+            if pretty:
+                return orjson.dumps(value, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson rejects float subclasses, i.e. a NonFiniteFloat score; same layout from json
+            if pretty:
+                return json.dumps(value, indent=2, ensure_ascii=False).encode('utf-8')
+            return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+except ImportError:
+    # orjson is optional, the standard library produces the same layout (only slower)
+    def dumps(value, pretty=False):
+        """UTF-8 JSON bytes of value, indented by 2 when pretty"""
+        if pretty:
+            return json.dumps(value, indent=2, ensure_ascii=False).encode('utf-8')
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+# Optional Numba kernels for the ziplist/listpack entry and string key scans, set by
+# load_fast_scans(); None until then, or when numpy/numba aren't installed
+scan_ziplist = scan_listpack = scan_string_records = None
+_fast_scans_tried = False
+
+# Files below this are parsed without rdb_fast: importing numba and loading its
+# compiled kernels takes longer (and more memory) than they save on them
+FAST_SCAN_MIN_BYTES = 8 << 20
+
+def load_fast_scans():
+    """Import rdb_fast on first use; the scans stay None if it can't be imported"""
+    global _fast_scans_tried, ENTRY_STRING, ENTRY_INT, scan_ziplist, scan_listpack, scan_string_records
+    if _fast_scans_tried:
+        return
+    _fast_scans_tried = True
+    try:
+        from rdb_fast import ENTRY_STRING, ENTRY_INT, scan_ziplist, scan_listpack, scan_string_records
+    except ImportError:
+        pass
+
 class RDBParser:
     # RDB opcodes
     OPCODE_IDLE = 0xF8
@@ -57,40 +175,172 @@ class RDBParser:
     RDB_ENC_INT32 = 2
     RDB_ENC_LZF = 3
 
-    def __init__(self, filename, simple_format=False):
+    # Precompiled fixed-width formats (little-endian)
+    _I16 = struct.Struct('<h')
+    _U16 = struct.Struct('<H')
+    _I32 = struct.Struct('<i')
+    _U32 = struct.Struct('<I')
+    _I64 = struct.Struct('<q')
+    _U64 = struct.Struct('<Q')
+    _F64 = struct.Struct('<d')
+
+    # Scores that show up constantly in string-encoded doubles
+    _COMMON_DOUBLES = {b'0': 0.0, b'1': 1.0, b'-1': -1.0}
+
+    # Value type -> human-readable type name
+    _TYPE_NAMES = {
+        TYPE_STRING: "string",
+        TYPE_LIST: "list",
+        TYPE_SET: "set",
+        TYPE_ZSET: "zset",
+        TYPE_ZSET_2: "zset",
+        TYPE_HASH: "hash",
+        TYPE_HASH_ZIPMAP: "hash",
+        TYPE_LIST_ZIPLIST: "list",
+        TYPE_SET_INTSET: "set",
+        TYPE_ZSET_ZIPLIST: "zset",
+        TYPE_HASH_ZIPLIST: "hash",
+        TYPE_LIST_QUICKLIST: "list",
+        TYPE_LIST_QUICKLIST_2: "list",
+        TYPE_HASH_LISTPACK: "hash",
+        TYPE_ZSET_LISTPACK: "zset",
+        TYPE_SET_LISTPACK: "set",
+        TYPE_STREAM_LISTPACKS: "stream",
+        TYPE_STREAM_LISTPACKS_2: "stream",
+        TYPE_STREAM_LISTPACKS_3: "stream",
+    }
+
+    # Intset encoding (bytes per integer) -> struct code
+    _INTSET_CODES = {2: 'h', 4: 'i', 8: 'q'}
+
+    # Invalid keys (or failed values) between running-total lines without --verbose
+    SKIP_REPORT_INTERVAL = 10000
+
+    # Bytes of records per task with processes > 1, and tasks in flight per process;
+    # bounds what the workers and the parent hold at once
+    PARALLEL_CHUNK_BYTES = 1 << 16
+    PARALLEL_TASKS_PER_PROCESS = 2
+
+    # Rows parse_columns adds at a time when there is no RESIZEDB hint to size by
+    PRE_SIZE_STEP = 1024
+
+    # Positions of an entry's fields in columnar format
+    COLUMNAR_SCHEMA = ("value", "type", "expiry_ms", "expiry_date", "idle", "freq")
+
+    def __init__(self, filename, simple_format=False, verbose=False, columnar=False, processes=1):
         self.filename = filename
         self.data = {}
         self.aux_data = {}
         self.current_db = 0
-        self.file = None
+        self.skipped_keys = 0  # invalid keys skipped by the last parse
+        self.failed_keys = 0  # keys whose value failed to parse in the last parse
+        self._pre_size_hint = 0  # keys announced by RESIZEDB that parse_columns hasn't made room for
+        self.rdb_version = None
+        self.buf = None  # memoryview of the mapped file
+        self.pos = 0
         self.simple_format = simple_format
+        self.columnar = columnar  # full-format entries as COLUMNAR_SCHEMA lists, not dicts
+        self.verbose = verbose  # print per-entry parse warnings to stderr
+        self.processes = processes  # worker processes parsing ranges of the file
+
+        # Value type -> reader, so read_value dispatches with one dict lookup
+        self._handlers = {
+            self.TYPE_STRING: self.read_string,
+            self.TYPE_LIST: self.read_list,
+            self.TYPE_SET: self.read_set,
+            self.TYPE_ZSET: self.read_zset,
+            self.TYPE_ZSET_2: self.read_zset_2,
+            self.TYPE_HASH: self.read_hash,
+            self.TYPE_HASH_ZIPMAP: self.read_hash_zipmap,
+            self.TYPE_LIST_ZIPLIST: self.read_list_ziplist,
+            self.TYPE_SET_INTSET: self.read_set_intset,
+            self.TYPE_ZSET_ZIPLIST: self.read_zset_ziplist,
+            self.TYPE_HASH_ZIPLIST: self.read_hash_ziplist,
+            self.TYPE_LIST_QUICKLIST: self.read_quicklist,
+            self.TYPE_LIST_QUICKLIST_2: self.read_quicklist,
+            self.TYPE_HASH_LISTPACK: self.read_hash_listpack,
+            self.TYPE_ZSET_LISTPACK: self.read_zset_listpack,
+            self.TYPE_SET_LISTPACK: self.read_set_listpack,
+            self.TYPE_STREAM_LISTPACKS: self.read_stream,
+            self.TYPE_STREAM_LISTPACKS_2: self.read_stream,
+            self.TYPE_STREAM_LISTPACKS_3: self.read_stream,
+        }
+
+        # Value type -> skipper, advancing past a value exactly as its reader would
+        self._skippers = {
+            self.TYPE_STRING: self.skip_string,
+            self.TYPE_LIST: self.skip_list,
+            self.TYPE_SET: self.skip_list,
+            self.TYPE_ZSET: self.skip_zset,
+            self.TYPE_ZSET_2: self.skip_zset_2,
+            self.TYPE_HASH: self.skip_hash,
+            self.TYPE_HASH_ZIPMAP: self.skip_string,
+            self.TYPE_LIST_ZIPLIST: self.skip_string,
+            self.TYPE_SET_INTSET: self.skip_string,
+            self.TYPE_ZSET_ZIPLIST: self.skip_string,
+            self.TYPE_HASH_ZIPLIST: self.skip_string,
+            self.TYPE_LIST_QUICKLIST: self.skip_list,
+            self.TYPE_LIST_QUICKLIST_2: self.skip_list,
+            self.TYPE_HASH_LISTPACK: self.skip_string,
+            self.TYPE_ZSET_LISTPACK: self.skip_string,
+            self.TYPE_SET_LISTPACK: self.skip_string,
+            # Streams are only read as far as their element count
+            self.TYPE_STREAM_LISTPACKS: self.read_stream,
+            self.TYPE_STREAM_LISTPACKS_2: self.read_stream,
+            self.TYPE_STREAM_LISTPACKS_3: self.read_stream,
+        }
+
+        # Opcode -> handler for everything that is not a value type;
+        # a handler returns True when parsing should stop
+        self._opcodes = {
+            self.OPCODE_EOF: self._on_eof,
+            self.OPCODE_SELECTDB: self._on_selectdb,
+            self.OPCODE_AUX: self._on_aux,
+            self.OPCODE_RESIZEDB: self._on_resizedb,
+            self.OPCODE_EXPIRETIME_MS: self._on_expiretime_ms,
+            self.OPCODE_EXPIRETIME: self._on_expiretime,
+            self.OPCODE_IDLE: self._on_idle,
+            self.OPCODE_FREQ: self._on_freq,
+        }
+        self._reset_metadata()
 
     def read_byte(self):
-        byte = self.file.read(1)
-        if not byte:
-            raise EOFError("Unexpected end of file")
-        return byte[0]
+        try:
+            byte = self.buf[self.pos]
+        except IndexError:
+            raise EOFError("Unexpected end of file") from None
+        self.pos += 1
+        return byte
 
     def read_bytes(self, n):
-        data = self.file.read(n)
+        # A slice of the memoryview, not a copy
+        data = self.buf[self.pos:self.pos + n]
         if len(data) != n:
             raise EOFError(f"Expected {n} bytes, got {len(data)}")
+        self.pos += n
         return data
 
+    def skip_bytes(self, n):
+        """Advance past n bytes, raising like read_bytes if the file is shorter"""
+        if self.pos + n > len(self.buf):
+            raise EOFError(f"Expected {n} bytes, got {len(self.buf) - self.pos}")
+        self.pos += n
+
     def read_signed_byte(self):
-        return struct.unpack('b', self.read_bytes(1))[0]
+        byte = self.read_byte()
+        return byte - 256 if byte >= 128 else byte
 
     def read_signed_short(self):
-        return struct.unpack('<h', self.read_bytes(2))[0]
+        return self._I16.unpack(self.read_bytes(2))[0]
 
     def read_signed_int(self):
-        return struct.unpack('<i', self.read_bytes(4))[0]
+        return self._I32.unpack(self.read_bytes(4))[0]
 
     def read_unsigned_int(self):
-        return struct.unpack('<I', self.read_bytes(4))[0]
+        return self._U32.unpack(self.read_bytes(4))[0]
 
     def read_unsigned_long(self):
-        return struct.unpack('<Q', self.read_bytes(8))[0]
+        return self._U64.unpack(self.read_bytes(8))[0]
 
     def read_length_with_encoding(self):
         """Read length encoding and return (length, is_encoded, encoding_type)"""
@@ -158,7 +408,8 @@ class RDBParser:
                 # This might not be a special encoding, it might be a regular length
                 # Encoding values > 3 in special encoding shouldn't happen
                 # This might be a parsing error - treat as length
-                print(f"Warning: Unexpected encoding value {encoding}, treating as regular length", file=sys.stderr)
+                if self.verbose:
+                    print(f"Warning: Unexpected encoding value {encoding}, treating as regular length", file=sys.stderr)
                 # Re-interpret: we already consumed the length byte, so we can't go back
                 # Return placeholder and hope the stream recovers
                 return f"<parse_error_enc:{encoding}>"
@@ -166,31 +417,21 @@ class RDBParser:
             # Regular string
             if length == 0:
                 return ""
-            if length < 0 or length > 1024 * 1024 * 100:  # Max 100MB strings
-                print(f"Warning: Suspicious string length {length}, skipping", file=sys.stderr)
-                return f"<invalid_length:{length}>"
-            data = self.read_bytes(length)
-            try:
-                return data.decode('utf-8', errors='replace')
-            except:
-                # If decode fails, return hex
-                try:
-                    return data.hex()
-                except:
-                    return "<binary_data>"
+            # 'replace' never raises; a length past the end of the file raises EOFError
+            return str(self.read_bytes(length), 'utf-8', errors='replace')
 
     def read_string_raw(self):
         """Read string as raw bytes (for binary structures like listpack/ziplist)"""
         length, is_encoded, encoding = self.read_length_with_encoding()
 
         if is_encoded:
+            # The integer encodings are stored little-endian already: return their bytes as is
             if encoding == self.RDB_ENC_INT8:
-                # Return single byte as bytes
-                return bytes([self.read_signed_byte() & 0xFF])
+                return self.read_bytes(1)
             elif encoding == self.RDB_ENC_INT16:
-                return struct.pack('<h', self.read_signed_short())
+                return self.read_bytes(2)
             elif encoding == self.RDB_ENC_INT32:
-                return struct.pack('<i', self.read_signed_int())
+                return self.read_bytes(4)
             elif encoding == self.RDB_ENC_LZF:
                 # LZF compressed string
                 compressed_len = self.read_length()
@@ -201,7 +442,8 @@ class RDBParser:
                 except:
                     return compressed_data
             else:
-                print(f"Warning: Unknown encoding in raw read: {encoding}", file=sys.stderr)
+                if self.verbose:
+                    print(f"Warning: Unknown encoding in raw read: {encoding}", file=sys.stderr)
                 return b""
         else:
             # Regular string - return raw bytes
@@ -211,14 +453,10 @@ class RDBParser:
 
     def lzf_decompress(self, data, expected_length):
         """Simple LZF decompression attempt"""
-        # LZF is not in standard library, so we'll try basic approach
-        # For production, use python-lzf library
-        try:
-            import lzf
-            return lzf.decompress(data, expected_length)
-        except ImportError:
-            # If lzf not available, return placeholder
-            return b"<LZF compressed data - install python-lzf to decompress>"
+        if _lzf_decompress is None:
+            return lzf_decompress_python(data, expected_length)
+        # python-lzf only takes bytes, not a memoryview
+        return _lzf_decompress(bytes(data), expected_length)
 
     def read_double(self):
         """Read double value"""
@@ -231,7 +469,11 @@ class RDBParser:
             return float('nan')
         else:
             data = self.read_bytes(length)
-            return float(data.decode('ascii'))
+            if length <= 2:
+                value = self._COMMON_DOUBLES.get(data)
+                if value is not None:
+                    return value
+            return float(str(data, 'ascii'))
 
     def read_list_ziplist(self):
         """Read ziplist encoded list"""
@@ -239,7 +481,8 @@ class RDBParser:
         try:
             return self.parse_ziplist(ziplist_bytes)
         except Exception as e:
-            print(f"Failed to parse ziplist: {e}", file=sys.stderr)
+            if self.verbose:
+                print(f"Failed to parse ziplist: {e}", file=sys.stderr)
             return []
 
     def read_set_intset(self):
@@ -249,25 +492,14 @@ class RDBParser:
         if len(intset_bytes) < 8:
             return []
         try:
-            encoding = struct.unpack('<I', intset_bytes[0:4])[0]
-            length = struct.unpack('<I', intset_bytes[4:8])[0]
-            result = []
-            pos = 8
-            size = [2, 4, 8][encoding] if encoding < 3 else 4
-            for _ in range(min(length, 1000)):  # Limit to prevent issues
-                if pos + size > len(intset_bytes):
-                    break
-                if encoding == 2:
-                    val = struct.unpack('<h', intset_bytes[pos:pos+2])[0]
-                elif encoding == 4:
-                    val = struct.unpack('<i', intset_bytes[pos:pos+4])[0]
-                elif encoding == 8:
-                    val = struct.unpack('<q', intset_bytes[pos:pos+8])[0]
-                else:
-                    break
-                result.append(str(val))
-                pos += size
-            return result
+            encoding = self._U32.unpack_from(intset_bytes, 0)[0]
+            length = self._U32.unpack_from(intset_bytes, 4)[0]
+            code = self._INTSET_CODES.get(encoding)
+            if code is None:
+                return []
+            # The encoding is the integer width; decode all of them in one unpack call
+            length = min(length, (len(intset_bytes) - 8) // encoding)
+            return [str(val) for val in struct.unpack_from(f'<{length}{code}', intset_bytes, 8)]
         except:
             return []
 
@@ -276,33 +508,39 @@ class RDBParser:
         ziplist_bytes = self.read_string_raw()
         try:
             entries = self.parse_ziplist(ziplist_bytes)
-            # Convert to zset (member-score pairs)
-            zset_data = []
-            for i in range(0, len(entries), 2):
-                if i + 1 < len(entries):
-                    member = str(entries[i])
-                    score = float(entries[i + 1]) if isinstance(entries[i + 1], (int, float)) else 0
-                    zset_data.append({"member": member, "score": score})
-            return zset_data
+            return self.zset_from_entries(entries)
         except Exception as e:
-            print(f"Failed to parse zset ziplist: {e}", file=sys.stderr)
-            return []
+            if self.verbose:
+                print(f"Failed to parse zset ziplist: {e}", file=sys.stderr)
+            return self.make_zset([], [])
+
+    def make_zset(self, members, scores):
+        """Sorted set output: {member: score} in simple format, else parallel member/score lists"""
+        if not all(map(math.isfinite, scores)):
+            # Marked for dumps(), which would otherwise get null from orjson
+            scores = [score if math.isfinite(score) else NonFiniteFloat(score) for score in scores]
+        if self.simple_format:
+            return dict(zip(members, scores))
+        return {"members": members, "scores": scores}
+
+    def zset_from_entries(self, entries):
+        """Sorted set from alternating ziplist/listpack member and score entries"""
+        # A trailing odd entry is dropped
+        members = [str(member) for member in entries[0:len(entries) - 1:2]]
+        scores = [float(score) if isinstance(score, (int, float)) else 0 for score in entries[1::2]]
+        return self.make_zset(members, scores)
 
     def read_hash_ziplist(self):
         """Read ziplist encoded hash"""
         ziplist_bytes = self.read_string_raw()
         try:
             entries = self.parse_ziplist(ziplist_bytes)
-            # Convert to hash (key-value pairs)
-            hash_data = {}
-            for i in range(0, len(entries), 2):
-                if i + 1 < len(entries):
-                    key = str(entries[i])
-                    value = str(entries[i + 1])
-                    hash_data[key] = value
-            return hash_data
+            # Convert to hash (key-value pairs); a trailing odd entry is dropped
+            entries = iter(entries)
+            return {str(key): str(value) for key, value in zip(entries, entries)}
         except Exception as e:
-            print(f"Failed to parse hash ziplist: {e}", file=sys.stderr)
+            if self.verbose:
+                print(f"Failed to parse hash ziplist: {e}", file=sys.stderr)
             return {}
 
     def read_hash_listpack(self):
@@ -311,29 +549,16 @@ class RDBParser:
         if isinstance(entries, str):
             return {entries: ""}
 
-        # Convert list to hash (key-value pairs)
-        hash_data = {}
-        for i in range(0, len(entries), 2):
-            if i + 1 < len(entries):
-                key = str(entries[i])
-                value = str(entries[i + 1])
-                hash_data[key] = value
-        return hash_data
+        # Convert list to hash (key-value pairs); a trailing odd entry is dropped
+        entries = iter(entries)
+        return {str(key): str(value) for key, value in zip(entries, entries)}
 
     def read_zset_listpack(self):
         """Read listpack encoded sorted set"""
         entries = self.read_listpack()
         if isinstance(entries, str):
-            return [{"member": entries, "score": 0}]
-
-        # Convert to zset (member-score pairs)
-        zset_data = []
-        for i in range(0, len(entries), 2):
-            if i + 1 < len(entries):
-                member = str(entries[i])
-                score = float(entries[i + 1]) if isinstance(entries[i + 1], (int, float)) else 0
-                zset_data.append({"member": member, "score": score})
-        return zset_data
+            return self.make_zset([entries], [0])
+        return self.zset_from_entries(entries)
 
     def read_set_listpack(self):
         """Read listpack encoded set"""
@@ -355,7 +580,8 @@ class RDBParser:
                 entries = self.parse_ziplist(ziplist_bytes)
                 result.extend(entries)
             except Exception as e:
-                print(f"Failed to parse ziplist {i} in quicklist: {e}", file=sys.stderr)
+                if self.verbose:
+                    print(f"Failed to parse ziplist {i} in quicklist: {e}", file=sys.stderr)
                 continue
 
         return result
@@ -367,126 +593,170 @@ class RDBParser:
 
         # Ziplist header
         # zlbytes (4), zltail (4), zllen (2)
-        zlbytes = struct.unpack('<I', data[0:4])[0]
-        zltail = struct.unpack('<I', data[4:8])[0]
-        zllen = struct.unpack('<H', data[8:10])[0]
-
-        result = []
-        pos = 10
+        zlbytes = self._U32.unpack_from(data, 0)[0]
+        zltail = self._U32.unpack_from(data, 4)[0]
+        zllen = self._U16.unpack_from(data, 8)[0]
 
         # If zllen is less than 65535, it's the actual count
         # Otherwise we need to traverse
         count = zllen if zllen < 65535 else 999999
 
-        for i in range(count):
-            if pos >= len(data) - 1:
-                break
+        if scan_ziplist is not None:
+            return self.decode_scanned(data, scan_ziplist(data, count, zllen < 65535), "Unknown ziplist encoding")
 
-            # Check for end marker
-            if data[pos] == 0xFF:
-                break
+        # Every value takes at least 2 bytes, so a blob-sized list never grows
+        parse_entry = self.parse_ziplist_entry
+        view = memoryview(data)
+        last = len(data) - 1
+        result = [None] * min(count, last)
+        found = 0
+        pos = 10
 
-            try:
-                value, bytes_read = self.parse_ziplist_entry(data[pos:])
-                if value is not None:
-                    result.append(value)
-                pos += bytes_read
-                if bytes_read == 0:
-                    break
-            except Exception as e:
+        i = 0
+        try:
+            if zllen < 65535:
+                # Exact count: no end marker or position checks, a truncated
+                # entry still ends the loop by reading 0 bytes
+                for i in range(zllen):
+                    value, bytes_read = parse_entry(view, pos)
+                    if value is not None:
+                        result[found] = value
+                        found += 1
+                    pos += bytes_read
+                    if bytes_read == 0:
+                        break
+            else:
+                for i in range(count):
+                    if pos >= last:
+                        break
+
+                    # Check for end marker
+                    if data[pos] == 0xFF:
+                        break
+
+                    value, bytes_read = parse_entry(view, pos)
+                    if value is not None:
+                        result[found] = value
+                        found += 1
+                    pos += bytes_read
+                    if bytes_read == 0:
+                        break
+        except Exception as e:
+            if self.verbose:
                 print(f"Error parsing ziplist entry {i}: {e}", file=sys.stderr)
-                break
 
+        del result[found:]
+        return result
+
+    def decode_scanned(self, data, entries, unknown_message):
+        """Build entry values from the (kinds, values, lengths) of a rdb_fast scan"""
+        # One latin-1 decode of the whole blob maps byte i to character i, so ASCII
+        # strings are plain slices of it; only the others need their own UTF-8 decode
+        text = str(data, 'latin-1')
+        result = []
+        for kind, value, length in zip(*entries):
+            if kind == ENTRY_STRING:
+                string = text[value:value + length]
+                if not string.isascii():
+                    string = str(data[value:value + length], 'utf-8', errors='replace')
+                result.append(string)
+            elif kind == ENTRY_INT:
+                result.append(value)
+            elif self.verbose:
+                print(f"{unknown_message}: 0x{value:02x}", file=sys.stderr)
         return result
 
-    def parse_ziplist_entry(self, data):
-        """Parse a single ziplist entry"""
-        if len(data) < 2:
+    def parse_ziplist_entry(self, data, base=0):
+        """Parse a single ziplist entry starting at data[base]; offsets are relative to base"""
+        size = len(data) - base
+        if size < 2:
             return None, 0
 
         # Previous entry length (1 or 5 bytes)
-        prevlen = data[0]
+        prevlen = data[base]
         offset = 1
 
         if prevlen == 0xFE:
-            if len(data) < 5:
+            if size < 5:
                 return None, 0
-            prevlen = struct.unpack('<I', data[1:5])[0]
+            prevlen = self._U32.unpack_from(data, base + 1)[0]
             offset = 5
 
-        if offset >= len(data):
+        if offset >= size:
             return None, 0
 
         # Encoding byte
-        encoding = data[offset]
+        encoding = data[base + offset]
         offset += 1
 
         # String encodings (00, 01, 10 prefix)
         if (encoding & 0xC0) == 0x00:
             # 6-bit length
             length = encoding & 0x3F
-            if offset + length > len(data):
+            if offset + length > size:
                 return None, 0
-            value = data[offset:offset + length].decode('utf-8', errors='replace')
+            value = str(data[base + offset:base + offset + length], 'utf-8', errors='replace')
             return value, offset + length
 
         elif (encoding & 0xC0) == 0x40:
             # 14-bit length
-            if offset >= len(data):
+            if offset >= size:
                 return None, 0
-            length = ((encoding & 0x3F) << 8) | data[offset]
+            length = ((encoding & 0x3F) << 8) | data[base + offset]
             offset += 1
-            if offset + length > len(data):
+            if offset + length > size:
                 return None, 0
-            value = data[offset:offset + length].decode('utf-8', errors='replace')
+            value = str(data[base + offset:base + offset + length], 'utf-8', errors='replace')
             return value, offset + length
 
         elif (encoding & 0xC0) == 0x80:
             # 32-bit length
-            if offset + 4 > len(data):
+            if offset + 4 > size:
                 return None, 0
-            length = struct.unpack('<I', data[offset:offset + 4])[0]
+            length = self._U32.unpack_from(data, base + offset)[0]
             offset += 4
-            if offset + length > len(data):
+            if offset + length > size:
                 return None, 0
-            value = data[offset:offset + length].decode('utf-8', errors='replace')
+            value = str(data[base + offset:base + offset + length], 'utf-8', errors='replace')
             return value, offset + length
 
         # Integer encodings
         elif encoding == 0xC0:
             # 16-bit integer
-            if offset + 2 > len(data):
+            if offset + 2 > size:
                 return None, 0
-            value = struct.unpack('<h', data[offset:offset + 2])[0]
+            value = self._I16.unpack_from(data, base + offset)[0]
             return value, offset + 2
 
         elif encoding == 0xD0:
             # 32-bit integer
-            if offset + 4 > len(data):
+            if offset + 4 > size:
                 return None, 0
-            value = struct.unpack('<i', data[offset:offset + 4])[0]
+            value = self._I32.unpack_from(data, base + offset)[0]
             return value, offset + 4
 
         elif encoding == 0xE0:
             # 64-bit integer
-            if offset + 8 > len(data):
+            if offset + 8 > size:
                 return None, 0
-            value = struct.unpack('<q', data[offset:offset + 8])[0]
+            value = self._I64.unpack_from(data, base + offset)[0]
             return value, offset + 8
 
         elif encoding == 0xF0:
             # 24-bit integer
-            if offset + 3 > len(data):
+            if offset + 3 > size:
                 return None, 0
-            value_bytes = data[offset:offset + 3]
+            value_bytes = data[base + offset:base + offset + 3]
             value = int.from_bytes(value_bytes, byteorder='little', signed=True)
             return value, offset + 3
 
         elif encoding == 0xFE:
             # 8-bit integer
-            if offset + 1 > len(data):
+            if offset + 1 > size:
                 return None, 0
-            value = struct.unpack('b', data[offset:offset + 1])[0]
+            value = data[base + offset]
+            if value >= 128:
+                value -= 256
             return value, offset + 1
 
         elif (encoding & 0xF0) == 0xF0:
@@ -495,7 +765,8 @@ class RDBParser:
             return value, offset
 
         else:
-            print(f"Unknown ziplist encoding: 0x{encoding:02x}", file=sys.stderr)
+            if self.verbose:
+                print(f"Unknown ziplist encoding: 0x{encoding:02x}", file=sys.stderr)
             return None, 1
 
     def read_listpack(self):
@@ -507,161 +778,144 @@ class RDBParser:
         try:
             return self.parse_listpack(listpack_bytes)
         except Exception as e:
-            print(f"Failed to parse listpack ({len(listpack_bytes)} bytes): {e}", file=sys.stderr)
+            if self.verbose:
+                print(f"Failed to parse listpack ({len(listpack_bytes)} bytes): {e}", file=sys.stderr)
             return []
 
     def parse_listpack(self, data):
         """Parse listpack binary format"""
         if len(data) < 7:
-            print(f"Listpack too short: {len(data)} bytes", file=sys.stderr)
+            if self.verbose:
+                print(f"Listpack too short: {len(data)} bytes", file=sys.stderr)
             return []
 
         # Listpack header: total bytes (4), num elements (2)
-        total_bytes = struct.unpack('<I', data[0:4])[0]
-        num_elements = struct.unpack('<H', data[4:6])[0]
+        total_bytes = self._U32.unpack_from(data, 0)[0]
+        num_elements = self._U16.unpack_from(data, 4)[0]
 
-        result = []
+        if scan_listpack is not None:
+            return self.decode_scanned(data, scan_listpack(data, num_elements), "Unknown listpack F-encoding")
+
+        parse_entry = self.parse_listpack_entry
+        view = memoryview(data)  # Entries are parsed in place, never sliced off
+        last = len(data) - 1
+        result = [None] * min(num_elements, last)
+        found = 0
         pos = 6
 
         for i in range(num_elements):
-            if pos >= len(data) - 1:
+            if pos >= last:
                 break
 
             try:
-                value, bytes_read = self.parse_listpack_entry(data[pos:])
+                value, bytes_read = parse_entry(view, pos)
                 if value is not None:
-                    result.append(value)
+                    result[found] = value
+                    found += 1
                 pos += bytes_read
                 if bytes_read == 0:
                     break
             except Exception as e:
-                print(f"Error parsing listpack entry {i}: {e}", file=sys.stderr)
+                if self.verbose:
+                    print(f"Error parsing listpack entry {i}: {e}", file=sys.stderr)
                 break
 
+        del result[found:]
         return result
 
-    def parse_listpack_entry(self, data):
-        """Parse a single listpack entry
-        Format: <encoding-type><element-data><element-tot-len>
-        The last byte (backlen) indicates the total entry length
-        """
-        if len(data) < 2:
-            return None, 0
-
-        byte = data[0]
-        start_pos = 0
+    # Listpack entry decoders, one per encoding of the first byte; offsets are relative to base
 
+    def _lp_7bit_str(self, data, base):
         # 7-bit small string (0xxxxxxx) - string with length 0-127
-        if byte <= 0x7F:
-            length = byte & 0x7F
-            if length == 0:
-                # Special case: empty string or marker
-                # Next byte is backlen
-                if len(data) < 2:
-                    return None, 0
-                backlen = data[1]
-                return "", 2
-
-            # String of given length
-            if len(data) < 1 + length + 1:
-                return None, 0
-            value = data[1:1 + length].decode('utf-8', errors='replace')
-            # Last byte is backlen (total entry size)
-            backlen = data[1 + length]
-            total_size = 1 + length + 1
-            return value, total_size
+        length = data[base] & 0x7F
+        if length == 0:
+            # Special case: empty string or marker
+            # Next byte is backlen
+            return "", 2
+
+        # String of given length, last byte is backlen (total entry size)
+        if len(data) - base < 1 + length + 1:
+            return None, 0
+        value = str(data[base + 1:base + 1 + length], 'utf-8', errors='replace')
+        return value, 1 + length + 1
 
+    def _lp_6bit_int(self, data, base):
         # 6-bit integer (110xxxxx) - integers 0-31
-        elif (byte & 0xE0) == 0xC0:
-            value = byte & 0x1F
-            if len(data) < 2:
-                return None, 0
-            backlen = data[1]
-            return value, 2
+        return data[base] & 0x1F, 2
 
+    def _lp_13bit_int(self, data, base):
         # 13-bit integer (1110xxxx xxxxxxxx)
-        elif (byte & 0xF0) == 0xE0:
-            if len(data) < 3:
-                return None, 0
-            value = ((byte & 0x0F) << 8) | data[1]
-            # Handle sign
-            if value & 0x800:
-                value = value - 0x1000
-            backlen = data[2]
-            return value, 3
+        if len(data) - base < 3:
+            return None, 0
+        value = ((data[base] & 0x0F) << 8) | data[base + 1]
+        # Handle sign
+        if value & 0x800:
+            value = value - 0x1000
+        return value, 3
 
+    def _lp_12bit_str(self, data, base):
         # 12-bit string (10xxxxxx xxxxxxxx)
-        elif (byte & 0xC0) == 0x80:
-            if len(data) < 2:
-                return None, 0
-            length = ((byte & 0x3F) << 8) | data[1]
-            if len(data) < 2 + length + 1:
-                return None, 0
-            value = data[2:2 + length].decode('utf-8', errors='replace')
-            backlen = data[2 + length]
-            total_size = 2 + length + 1
-            return value, total_size
-
-        # Special encodings (1111xxxx)
-        elif (byte & 0xF0) == 0xF0:
-            enc = byte & 0x0F
-
-            # 16-bit integer (11110001)
-            if enc == 0x01:
-                if len(data) < 4:
-                    return None, 0
-                value = struct.unpack('<h', data[1:3])[0]
-                backlen = data[3]
-                return value, 4
-
-            # 24-bit integer (11110010)
-            elif enc == 0x02:
-                if len(data) < 5:
-                    return None, 0
-                value_bytes = data[1:4]
-                # Sign extend from 24 to 32 bits
-                value = int.from_bytes(value_bytes, byteorder='little', signed=False)
-                if value & 0x800000:
-                    value = value - 0x1000000
-                backlen = data[4]
-                return value, 5
-
-            # 32-bit integer (11110011)
-            elif enc == 0x03:
-                if len(data) < 6:
-                    return None, 0
-                value = struct.unpack('<i', data[1:5])[0]
-                backlen = data[5]
-                return value, 6
-
-            # 64-bit integer (11110100)
-            elif enc == 0x04:
-                if len(data) < 10:
-                    return None, 0
-                value = struct.unpack('<q', data[1:9])[0]
-                backlen = data[9]
-                return value, 10
-
-            # 32-bit string length (11110000)
-            elif enc == 0x00:
-                if len(data) < 5:
-                    return None, 0
-                length = struct.unpack('<I', data[1:5])[0]
-                if len(data) < 5 + length + 1:
-                    return None, 0
-                value = data[5:5 + length].decode('utf-8', errors='replace')
-                backlen = data[5 + length]
-                total_size = 5 + length + 1
-                return value, total_size
-
-            # Unknown encoding
-            else:
-                print(f"Unknown listpack F-encoding: 0x{byte:02x}", file=sys.stderr)
-                return None, 1
+        length = ((data[base] & 0x3F) << 8) | data[base + 1]
+        if len(data) - base < 2 + length + 1:
+            return None, 0
+        value = str(data[base + 2:base + 2 + length], 'utf-8', errors='replace')
+        return value, 2 + length + 1
 
-        else:
-            print(f"Unknown listpack encoding byte: 0x{byte:02x}", file=sys.stderr)
-            return None, 1
+    def _lp_32bit_str(self, data, base):
+        # 32-bit string length (11110000)
+        size = len(data) - base
+        if size < 5:
+            return None, 0
+        length = self._U32.unpack_from(data, base + 1)[0]
+        if size < 5 + length + 1:
+            return None, 0
+        value = str(data[base + 5:base + 5 + length], 'utf-8', errors='replace')
+        return value, 5 + length + 1
+
+    def _lp_16bit_int(self, data, base):
+        # 16-bit integer (11110001)
+        if len(data) - base < 4:
+            return None, 0
+        return self._I16.unpack_from(data, base + 1)[0], 4
+
+    def _lp_24bit_int(self, data, base):
+        # 24-bit integer (11110010)
+        if len(data) - base < 5:
+            return None, 0
+        # No 3-byte struct format; from_bytes does the sign extension
+        return int.from_bytes(data[base + 1:base + 4], byteorder='little', signed=True), 5
+
+    def _lp_32bit_int(self, data, base):
+        # 32-bit integer (11110011)
+        if len(data) - base < 6:
+            return None, 0
+        return self._I32.unpack_from(data, base + 1)[0], 6
+
+    def _lp_64bit_int(self, data, base):
+        # 64-bit integer (11110100)
+        if len(data) - base < 10:
+            return None, 0
+        return self._I64.unpack_from(data, base + 1)[0], 10
+
+    def _lp_unknown(self, data, base):
+        if self.verbose:
+            print(f"Unknown listpack F-encoding: 0x{data[base]:02x}", file=sys.stderr)
+        return None, 1
+
+    # First byte -> decoder, replacing a chain of mask tests per entry
+    _LP_HANDLERS = ([_lp_7bit_str] * 0x80 + [_lp_12bit_str] * 0x40 + [_lp_6bit_int] * 0x20
+                    + [_lp_13bit_int] * 0x10
+                    + [_lp_32bit_str, _lp_16bit_int, _lp_24bit_int, _lp_32bit_int, _lp_64bit_int]
+                    + [_lp_unknown] * 0x0B)
+
+    def parse_listpack_entry(self, data, base=0):
+        """Parse a single listpack entry starting at data[base]; offsets are relative to base
+        Format: <encoding-type><element-data><element-tot-len>
+        The last byte (backlen) indicates the total entry length
+        """
+        if len(data) - base < 2:
+            return None, 0
+        return self._LP_HANDLERS[data[base]](self, data, base)
 
     def read_stream(self):
         """Read stream data"""
@@ -669,283 +923,779 @@ class RDBParser:
         num_elements = self.read_length()
         return f"<stream with {num_elements} elements>"
 
-    def read_value(self, value_type):
-        """Read value based on type"""
-        if value_type == self.TYPE_STRING:
-            return self.read_string()
+    def read_list(self):
+        """Read plain list"""
+        size = self.read_length()
+        return [self.read_string() for _ in range(size)]
 
-        elif value_type == self.TYPE_LIST:
-            size = self.read_length()
-            return [self.read_string() for _ in range(size)]
-
-        elif value_type == self.TYPE_SET:
-            size = self.read_length()
-            return list(set(self.read_string() for _ in range(size)))
-
-        elif value_type == self.TYPE_ZSET or value_type == self.TYPE_ZSET_2:
-            size = self.read_length()
-            zset_data = []
-            for _ in range(size):
-                member = self.read_string()
-                score = self.read_double() if value_type == self.TYPE_ZSET else struct.unpack('<d', self.read_bytes(8))[0]
-                zset_data.append({"member": member, "score": score})
-            return zset_data
-
-        elif value_type == self.TYPE_HASH:
-            size = self.read_length()
-            hash_data = {}
-            for _ in range(size):
-                key = self.read_string()
-                value = self.read_string()
-                hash_data[key] = value
-            return hash_data
-
-        elif value_type == self.TYPE_HASH_ZIPMAP:
-            zipmap = self.read_string()
-            return {f"<zipmap:{len(zipmap)} bytes>": ""}
-
-        elif value_type == self.TYPE_LIST_ZIPLIST:
-            return self.read_list_ziplist()
-
-        elif value_type == self.TYPE_SET_INTSET:
-            return self.read_set_intset()
-
-        elif value_type == self.TYPE_ZSET_ZIPLIST:
-            return self.read_zset_ziplist()
-
-        elif value_type == self.TYPE_HASH_ZIPLIST:
-            return self.read_hash_ziplist()
-
-        elif value_type in [self.TYPE_LIST_QUICKLIST, self.TYPE_LIST_QUICKLIST_2]:
-            return self.read_quicklist()
-
-        elif value_type in [self.TYPE_HASH_LISTPACK, self.TYPE_ZSET_LISTPACK, self.TYPE_SET_LISTPACK]:
-            if value_type == self.TYPE_HASH_LISTPACK:
-                return self.read_hash_listpack()
-            elif value_type == self.TYPE_ZSET_LISTPACK:
-                return self.read_zset_listpack()
-            else:
-                return self.read_set_listpack()
+    def read_set(self):
+        """Read plain set"""
+        size = self.read_length()
+        # Members in an RDB set are unique already; keep them in file order
+        return [self.read_string() for _ in range(size)]
 
-        elif value_type in [self.TYPE_STREAM_LISTPACKS, self.TYPE_STREAM_LISTPACKS_2, self.TYPE_STREAM_LISTPACKS_3]:
-            return self.read_stream()
+    def read_zset(self):
+        """Read sorted set with string-encoded scores"""
+        size = self.read_length()
+        read_string, read_double = self.read_string, self.read_double
+        members, scores = [], []
+        add_member, add_score = members.append, scores.append
+        for _ in range(size):
+            add_member(read_string())
+            add_score(read_double())
+        return self.make_zset(members, scores)
+
+    def read_zset_2(self):
+        """Read sorted set with binary double scores"""
+        size = self.read_length()
+        read_string, read_bytes, unpack_double = self.read_string, self.read_bytes, self._F64.unpack
+        members, scores = [], []
+        add_member, add_score = members.append, scores.append
+        # Scores sit between the members, so they can't be unpacked in one call
+        for _ in range(size):
+            add_member(read_string())
+            add_score(unpack_double(read_bytes(8))[0])
+        return self.make_zset(members, scores)
+
+    def read_hash(self):
+        """Read plain hash"""
+        size = self.read_length()
+        read_string = self.read_string
+        # Fields and values alternate: read all of them, then pair them up
+        strings = iter([read_string() for _ in range(2 * size)])
+        return dict(zip(strings, strings))
+
+    def read_hash_zipmap(self):
+        """Read zipmap encoded hash (not decoded)"""
+        zipmap = self.read_string()
+        return {f"<zipmap:{len(zipmap)} bytes>": ""}
+
+    def skip_string(self):
+        """Advance past a string as read_string would, without decoding it"""
+        length, is_encoded, encoding = self.read_length_with_encoding()
+        if is_encoded:
+            if encoding == self.RDB_ENC_INT8:
+                self.skip_bytes(1)
+            elif encoding == self.RDB_ENC_INT16:
+                self.skip_bytes(2)
+            elif encoding == self.RDB_ENC_INT32:
+                self.skip_bytes(4)
+            elif encoding == self.RDB_ENC_LZF:
+                compressed_len = self.read_length()
+                self.read_length()
+                self.skip_bytes(compressed_len)
+        elif length:
+            self.skip_bytes(length)
 
-        else:
-            # Unknown type, try to read as string
-            try:
-                return self.read_string()
-            except:
-                return f"<unknown type {value_type}>"
+    def skip_list(self, strings_per_item=1):
+        """Advance past a length-prefixed run of strings (plain list/set, hash, quicklist nodes)"""
+        skip_string = self.skip_string
+        for _ in range(strings_per_item * self.read_length()):
+            skip_string()
+
+    def skip_hash(self):
+        self.skip_list(2)
+
+    def skip_zset(self):
+        size = self.read_length()
+        skip_string, read_byte, skip_bytes = self.skip_string, self.read_byte, self.skip_bytes
+        for _ in range(size):
+            skip_string()
+            # String-encoded double; 253-255 are nan/inf/-inf with no payload
+            length = read_byte()
+            if length < 253:
+                skip_bytes(length)
+
+    def skip_zset_2(self):
+        size = self.read_length()
+        skip_string, skip_bytes = self.skip_string, self.skip_bytes
+        for _ in range(size):
+            skip_string()
+            skip_bytes(8)
+
+    def skip_value(self, value_type):
+        """Advance past a value as read_value would, without building it"""
+        skipper = self._skippers.get(value_type)
+        if skipper is not None:
+            skipper()
+            return
+
+        # Unknown type, read_value tries it as a string
+        try:
+            self.skip_string()
+        except:
+            pass
+
+    def read_value(self, value_type):
+        """Read value based on type"""
+        handler = self._handlers.get(value_type)
+        if handler is not None:
+            return handler()
+
+        # Unknown type, try to read as string
+        try:
+            return self.read_string()
+        except:
+            return f"<unknown type {value_type}>"
 
     def get_type_name(self, value_type):
         """Get human-readable type name"""
-        type_names = {
-            self.TYPE_STRING: "string",
-            self.TYPE_LIST: "list",
-            self.TYPE_SET: "set",
-            self.TYPE_ZSET: "zset",
-            self.TYPE_ZSET_2: "zset",
-            self.TYPE_HASH: "hash",
-            self.TYPE_HASH_ZIPMAP: "hash",
-            self.TYPE_LIST_ZIPLIST: "list",
-            self.TYPE_SET_INTSET: "set",
-            self.TYPE_ZSET_ZIPLIST: "zset",
-            self.TYPE_HASH_ZIPLIST: "hash",
-            self.TYPE_LIST_QUICKLIST: "list",
-            self.TYPE_LIST_QUICKLIST_2: "list",
-            self.TYPE_HASH_LISTPACK: "hash",
-            self.TYPE_ZSET_LISTPACK: "zset",
-            self.TYPE_SET_LISTPACK: "set",
-            self.TYPE_STREAM_LISTPACKS: "stream",
-            self.TYPE_STREAM_LISTPACKS_2: "stream",
-            self.TYPE_STREAM_LISTPACKS_3: "stream",
+        if 0 <= value_type < 256:
+            # The shared string, not a new one per call
+            return _TYPE_NAME_BY_BYTE[value_type]
+        return self._TYPE_NAMES.get(value_type, f"unknown_type_{value_type}")
+
+    def _make_entry(self, value, value_type, expiry, idle, freq):
+        """Full format entry: the value with its metadata"""
+        if self.columnar:
+            # Columnar format: the metadata by position, null when absent
+            entry = [value, _TYPE_NAME_BY_BYTE[value_type], None, None, idle, freq]
+            if expiry:
+                entry[2] = expiry
+                entry[3] = expiry_isoformat(expiry)
+            return entry
+
+        entry = {
+            "value": value,
+            "type": _TYPE_NAME_BY_BYTE[value_type]
         }
-        return type_names.get(value_type, f"unknown_type_{value_type}")
-
-    def parse(self):
-        """Parse RDB file"""
-        with open(self.filename, 'rb') as f:
-            self.file = f
+        if expiry:
+            entry["expiry_ms"] = expiry
+            entry["expiry_date"] = expiry_isoformat(expiry)
+        if idle is not None:
+            entry["idle"] = idle
+        if freq is not None:
+            entry["freq"] = freq
+        return entry
+
+    def _scanned_string(self, kind, value, size, uncompressed):
+        """The string read_string would return for a scan_string_records field"""
+        if kind == ENTRY_STRING:
+            return str(self.buf[value:value + size], 'utf-8', errors='replace')
+        if kind == ENTRY_INT:
+            return str(value)
+        try:
+            return self.lzf_decompress(self.buf[value:value + size], uncompressed).decode('utf-8', errors='replace')
+        except:
+            return f"<compressed:{size} bytes>"
 
-            # Read header
-            magic = self.read_bytes(5)
-            if magic != b'REDIS':
-                raise ValueError(f"Not a valid RDB file. Magic: {magic}")
+    def _iter_string_records(self, limit=sys.maxsize):
+        """(key, entry) for the run of string keys at self.pos, scanned by rdb_fast in one call
+        Only records that end by limit are scanned. Leaves self.pos after the last one;
+        yields nothing if the first key can't be scanned.
+        """
+        buf = self.buf if limit >= len(self.buf) else self.buf[:limit]
+        end, records = scan_string_records(buf, self.pos, self._expiry, self._idle, self._freq)
+        if end == self.pos:
+            return
+        self.pos = end
+        # The metadata read before each key; like iter_keys, a skipped key leaves it to the next one
+        self._reset_metadata()
+        pending_expiry = pending_idle = pending_freq = None
+        scanned_string = self._scanned_string
+        make_entry = self._make_entry
+        simple = self.simple_format
+        verbose = self.verbose
+        for key_kind, key_value, key_size, key_full, kind, value, size, full, expiry, idle, freq in records:
+            if expiry >= 0:
+                pending_expiry = expiry
+            if idle >= 0:
+                pending_idle = idle
+            if freq >= 0:
+                pending_freq = freq
+
+            if key_kind == ENTRY_STRING:
+                key = str(buf[key_value:key_value + key_size], 'utf-8', errors='replace')
+            else:
+                key = scanned_string(key_kind, key_value, key_size, key_full)
+            if verbose and key.startswith('<'):
+                print(f"Invalid key: {key[:30]}", file=sys.stderr)
+            if not key or key.startswith(BAD_KEY_PREFIXES):
+                self._skip_key(key)
+                continue
 
-            # Read version
-            version = self.read_bytes(4)
-            version_str = version.decode('ascii')
-            print(f"RDB Version: {version_str}", file=sys.stderr)
+            if kind == ENTRY_STRING:
+                value = str(buf[value:value + size], 'utf-8', errors='replace')
+            else:
+                value = scanned_string(kind, value, size, full)
+            if simple:
+                yield key, value
+            else:
+                try:
+                    entry = make_entry(value, self.TYPE_STRING, pending_expiry, pending_idle, pending_freq)
+                except Exception as e:
+                    # E.g. an expiry out of datetime's range; as in iter_keys, the metadata is kept
+                    self._fail_key(key, e)
+                    yield key, {"error": str(e), "type": _TYPE_NAME_BY_BYTE[self.TYPE_STRING]}
+                    continue
+                yield key, entry
+            pending_expiry = pending_idle = pending_freq = None
+        self._expiry, self._idle, self._freq = pending_expiry, pending_idle, pending_freq
+
+    def _skip_key(self, key):
+        """Count an invalid key; named with --verbose, else reported every SKIP_REPORT_INTERVAL keys"""
+        self.skipped_keys += 1
+        if self.verbose:
+            print(f"Skipping invalid key: {key}", file=sys.stderr)
+        elif self.skipped_keys % self.SKIP_REPORT_INTERVAL == 0:
+            print(f"Skipped {self.skipped_keys} invalid keys so far", file=sys.stderr)
+
+    def _fail_key(self, key, error):
+        """Count a value that failed to parse; printed with --verbose, else every SKIP_REPORT_INTERVAL"""
+        self.failed_keys += 1
+        if self.verbose:
+            # Formatted only when it is printed
+            sys.stderr.write("Error reading value for key '%s': %s\n" % (key[:50], error))
+            traceback.print_exc(file=sys.stderr)
+        elif self.failed_keys % self.SKIP_REPORT_INTERVAL == 0:
+            sys.stderr.write("%d values failed to parse so far\n" % self.failed_keys)
+
+    def _reset_metadata(self):
+        """Forget the expiry/idle/freq read for the previous key"""
+        self._expiry = None
+        self._idle = None
+        self._freq = None
+
+    def _on_eof(self):
+        # Read checksum if present
+        try:
+            checksum = self.read_bytes(8).hex()
+            print(f"Checksum: {checksum}", file=sys.stderr)
+        except:
+            pass
+        return True
 
-            expiry = None
-            idle = None
-            freq = None
+    def _on_selectdb(self):
+        self.current_db = self.read_length()
+        print(f"Selected DB: {self.current_db}", file=sys.stderr)
 
-            while True:
-                try:
-                    opcode = self.read_byte()
+    def _on_aux(self):
+        key = self.read_string()
+        value = self.read_string()
+        self.aux_data[key] = value
+        print(f"AUX: {key} = {value}", file=sys.stderr)
 
-                    if opcode == self.OPCODE_EOF:
-                        # Read checksum if present
-                        try:
-                            checksum = self.read_bytes(8)
-                            print(f"Checksum: {checksum.hex()}", file=sys.stderr)
-                        except:
-                            pass
-                        break
+    def _on_resizedb(self):
+        db_size = self.read_length()
+        expires_size = self.read_length()
+        self._pre_size_hint += db_size
+        print(f"DB size: {db_size}, Expires: {expires_size}", file=sys.stderr)
 
-                    elif opcode == self.OPCODE_SELECTDB:
-                        self.current_db = self.read_length()
-                        print(f"Selected DB: {self.current_db}", file=sys.stderr)
+    def _on_expiretime_ms(self):
+        self._expiry = self.read_unsigned_long()
 
-                    elif opcode == self.OPCODE_AUX:
-                        key = self.read_string()
-                        value = self.read_string()
-                        self.aux_data[key] = value
-                        print(f"AUX: {key} = {value}", file=sys.stderr)
+    def _on_expiretime(self):
+        self._expiry = self.read_unsigned_int() * 1000
 
-                    elif opcode == self.OPCODE_RESIZEDB:
-                        db_size = self.read_length()
-                        expires_size = self.read_length()
-                        print(f"DB size: {db_size}, Expires: {expires_size}", file=sys.stderr)
+    def _on_idle(self):
+        self._idle = self.read_length()
 
-                    elif opcode == self.OPCODE_EXPIRETIME_MS:
-                        expiry = self.read_unsigned_long()
+    def _on_freq(self):
+        self._freq = self.read_byte()
 
-                    elif opcode == self.OPCODE_EXPIRETIME:
-                        expiry = self.read_unsigned_int() * 1000
+    @contextlib.contextmanager
+    def _open_buffer(self):
+        """Memoryview of the whole file: mapped, or read in bulk if it can't be mapped"""
+        with open(self.filename, 'rb', buffering=1 << 20) as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Pipes and empty files can't be mapped; read outside the handler,
+                # so parse errors don't carry the mmap failure as their context
+                mapped = None
+            if mapped is None:
+                data = f.read()
+                if len(data) >= FAST_SCAN_MIN_BYTES:
+                    load_fast_scans()
+                with memoryview(data) as view:
+                    yield view
+                return
+            if len(mapped) >= FAST_SCAN_MIN_BYTES:
+                load_fast_scans()
+            with mapped, memoryview(mapped) as view:
+                yield view
+
+    def _read_header(self):
+        """Check the magic string and read rdb_version at the start of the file"""
+        # Copies, so no view of the mapping outlives it
+        magic = bytes(self.read_bytes(5))
+        if magic != b'REDIS':
+            raise ValueError(f"Not a valid RDB file. Magic: {magic}")
+
+        # Read version
+        self.rdb_version = str(self.read_bytes(4), 'ascii')
+        print(f"RDB Version: {self.rdb_version}", file=sys.stderr)
+
+    def _print_summary(self, count):
+        summary = f"Parsed {count} keys"
+        if self.skipped_keys:
+            summary += f", skipped {self.skipped_keys} invalid keys"
+        if self.failed_keys:
+            summary += f", {self.failed_keys} values failed to parse (--verbose for details)"
+        print(summary, file=sys.stderr)
+
+    def iter_keys(self):
+        """Parse RDB file, yielding (key, entry) as each key is read
+        entry is the bare value in simple format, else the value with its metadata.
+        rdb_version, aux_data and current_db are filled in along the way.
+        """
+        self.skipped_keys = 0
+        self.failed_keys = 0
+        # Reads slice one memoryview of the whole file at self.pos instead
+        # of calling file.read() and allocating bytes for every field
+        with self._open_buffer() as self.buf:
+            self.pos = 0
+            self._read_header()
+            self._reset_metadata()
+            # Workers reopen the file by name, so only a mapped regular file can be split
+            if (self.processes > 1 and isinstance(self.buf.obj, mmap.mmap)
+                    and os.path.isfile(self.filename)):
+                count = yield from self._iter_keys_parallel()
+            else:
+                count = yield from self._iter_records()
+        self._print_summary(count)
 
-                    elif opcode == self.OPCODE_IDLE:
-                        idle = self.read_length()
+    def _iter_records(self, end=sys.maxsize):
+        """(key, entry) for each record from self.pos until end or the EOF opcode; returns the count
+        The metadata already read (self._expiry, ...) applies to the first key.
+        """
+        count = 0
+        self._stopped = True
+        opcodes = self._opcodes
+        type_names = _TYPE_NAME_BY_BYTE
+        # Per-key lookups, bound once
+        read_byte = self.read_byte
+        read_string = self.read_string
+        read_value = self.read_value
+        skip_value = self.skip_value
+        make_entry = self._make_entry
+        # Runs of string keys go through the Numba record scan when it is available
+        scan_strings = scan_string_records is not None
+        iter_string_records = self._iter_string_records
+        buf = self.buf
+        size = len(buf)
+        simple = self.simple_format
+        verbose = self.verbose
+        stderr = sys.stderr
+
+        while self.pos < end:
+            try:
+                if scan_strings and self.pos < size and buf[self.pos] == self.TYPE_STRING:
+                    scanned = 0
+                    for key, entry in iter_string_records(end):
+                        scanned += 1
+                        yield key, entry
+                    count += scanned
+                    if scanned:
+                        continue
+
+                opcode = read_byte()
+
+                handler = opcodes.get(opcode)
+                if handler is not None:
+                    if handler():
+                        break
+                else:
+                    # It's a value type opcode
+                    value_type = opcode
+                    expiry, idle, freq = self._expiry, self._idle, self._freq
+
+                    # Only print debug for problematic types
+                    if verbose and value_type > 21:
+                        print(f"Warning: Unexpected type {value_type} at position {self.pos}", file=stderr)
+
+                    try:
+                        key = read_string()
+                        # Only print for invalid keys
+                        if verbose and key.startswith('<'):
+                            print(f"Invalid key: {key[:30]}", file=stderr)
+                    except Exception as e:
+                        if verbose:
+                            print(f"Error reading key: {e}, skipping entry", file=stderr)
+                        continue
+
+                    # Skip invalid keys
+                    if not key or key.startswith(BAD_KEY_PREFIXES):
+                        self._skip_key(key)
+                        try:
+                            # Advance past the value without building it
+                            skip_value(value_type)
+                        except:
+                            pass
+                        continue
 
-                    elif opcode == self.OPCODE_FREQ:
-                        freq = self.read_byte()
+                    try:
+                        value = read_value(value_type)
 
-                    else:
-                        # It's a value type opcode
-                        value_type = opcode
+                        if simple:
+                            # Simple format: just the value
+                            entry = value
+                        else:
+                            entry = make_entry(value, value_type, expiry, idle, freq)
 
-                        # Only print debug for problematic types
-                        if value_type > 21:
-                            print(f"Warning: Unexpected type {value_type} at position {self.file.tell()}", file=sys.stderr)
+                        # Reset metadata
+                        self._reset_metadata()
 
-                        try:
-                            key = self.read_string()
-                            # Only print for invalid keys
-                            if key.startswith('<'):
-                                print(f"Invalid key: {key[:30]}", file=sys.stderr)
-                        except Exception as e:
-                            print(f"Error reading key: {e}, skipping entry", file=sys.stderr)
+                    except Exception as e:
+                        self._fail_key(key, e)
+                        if simple:
                             continue
+                        entry = {
+                            "error": str(e),
+                            "type": type_names[value_type]
+                        }
 
-                        # Skip invalid keys
-                        if not key or key.startswith('<unknown') or key.startswith('<binary') or key.startswith('<parse_error') or key.startswith('<invalid'):
-                            print(f"Skipping invalid key: {key}", file=sys.stderr)
-                            try:
-                                # Try to skip the value
-                                self.read_value(value_type)
-                            except:
-                                pass
-                            continue
+                    count += 1
+                    yield key, entry
 
-                        try:
-                            value = self.read_value(value_type)
-
-                            if self.simple_format:
-                                # Simple format: just the value
-                                self.data[key] = value
-                            else:
-                                # Full format: with metadata
-                                entry = {
-                                    "value": value,
-                                    "type": self.get_type_name(value_type)
-                                }
-
-                                if expiry:
-                                    entry["expiry_ms"] = expiry
-                                    entry["expiry_date"] = datetime.fromtimestamp(expiry / 1000).isoformat()
-                                if idle is not None:
-                                    entry["idle"] = idle
-                                if freq is not None:
-                                    entry["freq"] = freq
-
-                                self.data[key] = entry
-
-                            # Reset metadata
-                            expiry = None
-                            idle = None
-                            freq = None
-
-                        except Exception as e:
-                            print(f"Error reading value for key '{key[:50]}': {e}", file=sys.stderr)
-                            import traceback
-                            traceback.print_exc(file=sys.stderr)
-                            if not self.simple_format:
-                                self.data[key] = {
-                                    "error": str(e),
-                                    "type": self.get_type_name(value_type)
-                                }
-
-                except EOFError:
-                    print("Reached end of file", file=sys.stderr)
+            except EOFError:
+                print("Reached end of file", file=stderr)
+                break
+            except Exception as e:
+                print(f"Error during parsing: {e}", file=stderr)
+                traceback.print_exc(file=stderr)
+                break
+        else:
+            # Stopped at end rather than on the EOF opcode or an error
+            self._stopped = False
+        return count
+
+    def _scan_ranges(self):
+        """Split the records from self.pos on into (db, start, end) ranges for _iter_keys_parallel
+        Walks the file with the skippers, which read only lengths, starting a range about every
+        PARALLEL_CHUNK_BYTES where no expiry/idle/freq is pending. The last range holds the EOF
+        opcode; if the skippers run into the end of the file or a bad length first, the ranges
+        stop before the record they failed on, and the rest is left to the serial parse.
+        """
+        ranges = []
+        start = self.pos
+        db = start_db = self.current_db
+        pending = False
+        try:
+            while True:
+                if not pending and self.pos - start >= self.PARALLEL_CHUNK_BYTES:
+                    ranges.append((start_db, start, self.pos))
+                    start, start_db = self.pos, db
+                opcode = self.read_byte()
+                if opcode == self.OPCODE_EOF:
                     break
-                except Exception as e:
-                    print(f"Error during parsing: {e}", file=sys.stderr)
-                    import traceback
-                    traceback.print_exc(file=sys.stderr)
+                elif opcode == self.OPCODE_SELECTDB:
+                    db = self.read_length()
+                elif opcode == self.OPCODE_AUX:
+                    self.skip_string()
+                    self.skip_string()
+                elif opcode == self.OPCODE_RESIZEDB:
+                    self.read_length()
+                    self.read_length()
+                elif opcode == self.OPCODE_EXPIRETIME_MS:
+                    self.skip_bytes(8)
+                    pending = True
+                elif opcode == self.OPCODE_EXPIRETIME:
+                    self.skip_bytes(4)
+                    pending = True
+                elif opcode == self.OPCODE_IDLE:
+                    self.read_length()
+                    pending = True
+                elif opcode == self.OPCODE_FREQ:
+                    self.skip_bytes(1)
+                    pending = True
+                else:
+                    self.skip_string()
+                    self.skip_value(opcode)
+                    pending = False
+        except (EOFError, struct.error, IndexError, ValueError):
+            # Truncated or malformed: the serial parse meets the error where the reader does
+            return ranges
+        ranges.append((start_db, start, len(self.buf)))
+        return ranges
+
+    def _parse_range(self, db, start, end, size):
+        """Entries of the records in [start, end) and the state a serial parse carries on with:
+        (entries, skipped, failed, stopped, pos, current_db, metadata, aux_data)
+        size is the file size the parent saw, so a file that isn't the same here fails loudly.
+        """
+        self.current_db = db
+        with self._open_buffer() as self.buf:
+            if len(self.buf) != size:
+                raise ValueError(f"{self.filename} is {len(self.buf)} bytes in a worker process, "
+                                 f"{size} bytes when it was split")
+            self.pos = start
+            self._reset_metadata()
+            entries = list(self._iter_records(end))
+            return (entries, self.skipped_keys, self.failed_keys, self._stopped, self.pos,
+                    self.current_db, (self._expiry, self._idle, self._freq), self.aux_data)
+
+    def _iter_keys_parallel(self):
+        """The records from self.pos on, with the ranges of _scan_ranges parsed by worker
+        processes and yielded in file order; returns the count like _iter_records.
+        A worker's entries are used when the parse so far ends exactly at its range's start with
+        no metadata pending; otherwise (an invalid key left its expiry to the next one, or a
+        record overran its range) this process parses that range itself from where it is, as
+        it does any rest of the file the prescan couldn't split. AUX fields the workers read
+        are added to aux_data as their ranges are used.
+        """
+        # AUX fields usually all come first; read them here, before the ranges
+        while self.pos < len(self.buf) and self.buf[self.pos] == self.OPCODE_AUX:
+            self.pos += 1
+            self._on_aux()
+        # The position, DB and metadata a serial parse would have reached
+        pos, db = self.pos, self.current_db
+        ranges = self._scan_ranges()
+        if len(ranges) < 2:
+            # Too small to split
+            self.pos = pos
+            return (yield from self._iter_records())
+
+        count = 0
+        metadata = (None, None, None)
+        stopped = False
+        size = len(self.buf)
+        tasks = ((self.filename, self.simple_format, self.verbose, self.columnar) + task + (size,)
+                 for task in ranges)
+        window = self.processes * self.PARALLEL_TASKS_PER_PROCESS
+        with multiprocessing.Pool(self.processes) as pool:
+            # At most window results are pending, so memory stays bounded when the caller is slower
+            pending = collections.deque(pool.apply_async(_parse_range_task, (task,))
+                                        for task in itertools.islice(tasks, window))
+            for range_db, start, end in ranges:
+                result = pending.popleft().get()
+                task = next(tasks, None)
+                if task is not None:
+                    pending.append(pool.apply_async(_parse_range_task, (task,)))
+                if pos == start and db == range_db and metadata == (None, None, None):
+                    entries, skipped, failed, stopped, pos, db, metadata, aux_data = result
+                    self.skipped_keys += skipped
+                    self.failed_keys += failed
+                    self.aux_data.update(aux_data)
+                    count += len(entries)
+                    yield from entries
+                elif pos < end:
+                    self.pos, self.current_db = pos, db
+                    self._expiry, self._idle, self._freq = metadata
+                    count += yield from self._iter_records(end)
+                    pos, db, stopped = self.pos, self.current_db, self._stopped
+                    metadata = (self._expiry, self._idle, self._freq)
+                if stopped:
+                    # EOF opcode, end of file or a read error
                     break
 
-        print(f"Parsed {len(self.data)} keys", file=sys.stderr)
+        self.pos, self.current_db = pos, db
+        self._expiry, self._idle, self._freq = metadata
+        if not stopped:
+            # Past the last range: what the prescan couldn't split
+            count += yield from self._iter_records()
+        return count
+
+    def parse(self):
+        """Parse RDB file into one dict (use iter_keys to stream large files)"""
+        # Built by dict() straight from the (key, entry) pairs, without a per-key store in Python
+        self.data = dict(self.iter_keys())
 
         return {
-            "rdb_version": version_str,
+            "rdb_version": self.rdb_version,
             "aux": self.aux_data,
             "db": self.current_db,
             "keys": self.data
         }
 
+    def parse_columns(self):
+        """Parse RDB file (full format) into parallel per-key columns instead of a dict per key
+        "keys", "values" and "types" are lists; "expiry_ms", "idle" and "freq" are int64
+        arrays with -1 where a key has none. There is one row per key read, so a key found
+        in several DBs appears once for each. Keys whose value failed to parse get a None
+        value and their message in "errors".
+        """
+        if self.simple_format:
+            raise ValueError("parse_columns needs the full format; use parse() for simple values")
+        keys, values, types = [], [], []
+        expiries, idles, freqs = array('q'), array('q'), array('q')
+        errors = {}
+        # Rows are written in place; the columns grow by the key counts of the RESIZEDB
+        # hints (read before each DB's keys), or by PRE_SIZE_STEP rows without one
+        rows = 0
+        self._pre_size_hint = 0
+
+        columnar, self.columnar = self.columnar, True
+        try:
+            for key, entry in self.iter_keys():
+                if rows == len(keys):
+                    # A record takes at least 3 bytes (type, key and value lengths), which
+                    # bounds a hint that is corrupt or misread
+                    grow = min(self._pre_size_hint, (len(self.buf) - self.pos) // 3 + 1) or self.PRE_SIZE_STEP
+                    self._pre_size_hint = 0
+                    for column in (keys, values, types):
+                        column.extend(itertools.repeat(None, grow))
+                    for column in (expiries, idles, freqs):
+                        column.extend(array('q', [-1]) * grow)
+                if isinstance(entry, dict):
+                    # {"error", "type"} for a value that failed to parse
+                    errors[key] = entry["error"]
+                    entry = [None, entry["type"], None, None, None, None]
+                value, type_name, expiry, _, idle, freq = entry
+                keys[rows] = key
+                values[rows] = value
+                types[rows] = type_name
+                if expiry is not None:
+                    expiries[rows] = expiry
+                if idle is not None:
+                    idles[rows] = idle
+                if freq is not None:
+                    freqs[rows] = freq
+                rows += 1
+        finally:
+            self.columnar = columnar
+        # Hints count keys that were skipped, or not there at all
+        for column in (keys, values, types, expiries, idles, freqs):
+            del column[rows:]
+
+        return {
+            "rdb_version": self.rdb_version,
+            "aux": self.aux_data,
+            "db": self.current_db,
+            "keys": keys,
+            "values": values,
+            "types": types,
+            "expiry_ms": expiries,
+            "idle": idles,
+            "freq": freqs,
+            "errors": errors
+        }
+
+def _parse_range_task(task):
+    """Worker for RDBParser._iter_keys_parallel: parse one range of records"""
+    filename, simple, verbose, columnar, db, start, end, size = task
+    parser = RDBParser(filename, simple_format=simple, verbose=verbose, columnar=columnar)
+    return parser._parse_range(db, start, end, size)
+
+# Type name for every value type byte, so the parse loop indexes a tuple instead of calling get_type_name;
+# every entry of a type shares one interned string
+_TYPE_NAME_BY_BYTE = tuple(sys.intern(RDBParser._TYPE_NAMES.get(value_type, f"unknown_type_{value_type}"))
+                           for value_type in range(256))
+
+def dump_json(value, level=0, pretty=False):
+    """JSON bytes of value laid out as if nested at depth level"""
+    if not pretty or not level:
+        return dumps(value, pretty)
+    return dumps(value, True).replace(b"\n", b"\n" + b"  " * level)
+
+def write_json_object(out, items, level=0, pretty=False):
+    """Write (key, value) items as one JSON object at depth level, item by item; returns the count"""
+    separator = b",\n" + b"  " * (level + 1) if pretty else b","
+    # The separators of dumps(), so nested and top-level values share one layout
+    colon = b": " if pretty else b":"
+    count = 0
+    out.write(b"{")
+    for key, value in items:
+        if count:
+            out.write(separator)
+        elif pretty:
+            out.write(separator[1:])
+        out.write(dump_json(key))
+        out.write(colon)
+        out.write(dump_json(value, level + 1, pretty))
+        count += 1
+    if pretty and count:
+        out.write(b"\n" + b"  " * level)
+    out.write(b"}")
+    return count
+
+def write_json(parser, out, simple=False, pretty=False):
+    """Stream the parse result to the binary file out as JSON; keys are written as they are read, never all held"""
+    entries = parser.iter_keys()
+    if simple:
+        # In simple mode, just output the keys
+        return write_json_object(out, entries, 0, pretty)
+
+    # The AUX fields come before the first key, so the header can be written once it is read
+    first = next(entries, None)
+    if first is not None:
+        entries = itertools.chain([first], entries)
+    separator = b",\n  " if pretty else b","
+    colon = b": " if pretty else b":"
+    out.write(b"{\n  " if pretty else b"{")
+    out.write(b'"rdb_version"' + colon + dump_json(parser.rdb_version) + separator)
+    out.write(b'"aux"' + colon + dump_json(parser.aux_data, 1, pretty) + separator)
+    if parser.columnar:
+        out.write(b'"schema"' + colon + dump_json(list(parser.COLUMNAR_SCHEMA), 1, pretty) + separator)
+    out.write(b'"keys"' + colon)
+    count = write_json_object(out, entries, 1, pretty)
+    # The last selected DB is only known at the end, so "db" goes last
+    out.write(separator + b'"db"' + colon + dump_json(parser.current_db))
+    out.write(b"\n}" if pretty else b"}")
+    return count
+
+def write_ndjson(parser, out, simple=False):
+    """Stream the parse result to the binary file out as NDJSON, one {"key": ..., "value": ...} record per line
+    In full format the record also carries the entry's metadata (type, expiry, ...).
+    """
+    count = 0
+    for key, entry in parser.iter_keys():
+        record = {"key": key}
+        if simple:
+            record["value"] = entry
+        else:
+            record.update(entry)
+        out.write(dump_json(record))
+        out.write(b"\n")
+        count += 1
+    return count
+
+def open_output(path, gz=False):
+    """Binary output file, gzip-compressed at level 1 with gz or a .gz suffix"""
+    if gz or path.endswith('.gz'):
+        # Coalesce the writers' small writes before they reach the compressor
+        return io.BufferedWriter(gzip.open(path, 'wb', compresslevel=1), buffer_size=1 << 20)
+    return open(path, 'wb')
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: python rdb_parser.py <backup.rdb> [output.json] [options]")
         print("\nOptions:")
         print("  --pretty    Pretty print JSON output")
         print("  --simple    Simple format (values only, no metadata)")
+        print("  --verbose   Print per-entry parse warnings")
+        print("  --ndjson    One JSON record per key per line (ignores --pretty)")
+        print("  --gz        Gzip the output file (implied by a .gz file name)")
+        print("  --columnar  Full format entries as [value, type, expiry_ms, expiry_date, idle, freq]")
+        print("  --processes=N  Parse in N worker processes")
         sys.exit(1)
 
     rdb_file = sys.argv[1]
     pretty = "--pretty" in sys.argv
     simple = "--simple" in sys.argv
+    verbose = "--verbose" in sys.argv
+    ndjson = "--ndjson" in sys.argv
+    gz = "--gz" in sys.argv
+    # NDJSON records carry their metadata by name
+    columnar = "--columnar" in sys.argv and not ndjson
+    processes = 1
     output_file = None
 
     for arg in sys.argv[2:]:
-        if not arg.startswith("--"):
+        if arg.startswith("--processes="):
+            processes = int(arg.split("=", 1)[1])
+        elif not arg.startswith("--"):
             output_file = arg
 
     try:
-        parser = RDBParser(rdb_file, simple_format=simple)
-        result = parser.parse()
-
-        if simple:
-            # In simple mode, just output the keys
-            output = result["keys"]
-        else:
-            output = result
-
-        if pretty:
-            json_output = json.dumps(output, indent=2, ensure_ascii=False)
-        else:
-            json_output = json.dumps(output, ensure_ascii=False)
+        parser = RDBParser(rdb_file, simple_format=simple, verbose=verbose, columnar=columnar,
+                           processes=processes)
 
         if output_file:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(json_output)
+            with open_output(output_file, gz) as f:
+                if ndjson:
+                    write_ndjson(parser, f, simple)
+                else:
+                    write_json(parser, f, simple, pretty)
             print(f"\nExported to {output_file}", file=sys.stderr)
+        elif ndjson:
+            write_ndjson(parser, sys.stdout.buffer, simple)
         else:
-            print(json_output)
+            write_json(parser, sys.stdout.buffer, simple, pretty)
+            sys.stdout.buffer.write(b"\n")
 
     except Exception as e:
         print(f"Fatal error: {e}", file=sys.stderr)
-        import traceback
         traceback.print_exc(file=sys.stderr)
         sys.exit(1)
 
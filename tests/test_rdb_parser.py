@@ -0,0 +1,115 @@
+"""
+Tests for rdb_parser, run on small RDB files built here.
+Run with: python -m unittest discover tests
+"""
+
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PARSER = os.path.join(ROOT, "rdb_parser.py")
+
+def rdb_length(n):
+    """RDB length encoding (6, 14 or 32-bit, 32-bit little-endian like read_unsigned_int)"""
+    if n < 64:
+        return bytes([n])
+    if n < 16384:
+        return bytes([0x40 | (n >> 8), n & 0xFF])
+    return b"\x80" + struct.pack("<I", n)
+
+def rdb_string(value):
+    data = value.encode("utf-8")
+    return rdb_length(len(data)) + data
+
+def build_rdb(dbs=1, keys_per_db=10):
+    """RDB file bytes with strings, lists, hashes and sorted sets (one with +inf/-inf scores) per DB"""
+    out = [b"REDIS0011", b"\xfa" + rdb_string("redis-ver") + rdb_string("7.2.0")]
+    for db in range(dbs):
+        out.append(b"\xfe" + rdb_length(db) + b"\xfb" + rdb_length(keys_per_db) + rdb_length(1))
+        for i in range(keys_per_db):
+            key = f"key:{db}:{i}"
+            kind = i % 4
+            if kind == 0:
+                if i == 4:
+                    out.append(b"\xfc" + struct.pack("<Q", 1700000000123))
+                out.append(b"\x00" + rdb_string(key) + rdb_string(f"value {i}"))
+            elif kind == 1:
+                items = [f"item-{i}-{j}" for j in range(3)]
+                out.append(b"\x01" + rdb_string(key) + rdb_length(len(items)) + b"".join(map(rdb_string, items)))
+            elif kind == 2:
+                fields = [(f"field{j}", f"v{i}-{j}") for j in range(2)]
+                out.append(b"\x04" + rdb_string(key) + rdb_length(len(fields))
+                           + b"".join(rdb_string(f) + rdb_string(v) for f, v in fields))
+            else:
+                # String-encoded scores; 254/255 are +inf/-inf
+                out.append(b"\x03" + rdb_string(key) + rdb_length(3)
+                           + rdb_string("a") + rdb_string("1.5")
+                           + rdb_string("b") + b"\xfe"
+                           + rdb_string("c") + b"\xff")
+    out.append(b"\xff" + b"\0" * 8)
+    return b"".join(out)
+
+class ParserCLITest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def write_rdb(self, **kwargs):
+        path = self.path("dump.rdb")
+        with open(path, "wb") as f:
+            f.write(build_rdb(**kwargs))
+        return path
+
+    def run_parser(self, args, without_orjson=False, input=None):
+        """Output bytes of rdb_parser.py run with args; the input file comes first, the output is added
+        input is fed to its stdin through a pipe.
+        """
+        output = self.path("out.json")
+        code = "import runpy, sys\n"
+        if without_orjson:
+            # A None entry makes "import orjson" raise ImportError
+            code += "sys.modules['orjson'] = None\n"
+        code += "sys.argv = sys.argv[1:]\nrunpy.run_path(sys.argv[0], run_name='__main__')\n"
+        subprocess.run([sys.executable, "-c", code, PARSER] + args[:1] + [output] + args[1:],
+                       input=input, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        with open(output, "rb") as f:
+            return f.read()
+
+    def test_output_same_without_orjson(self):
+        try:
+            import orjson  # noqa: F401
+        except ImportError:
+            self.skipTest("orjson is not installed")
+        rdb = self.write_rdb(dbs=2, keys_per_db=12)
+        for options in ([], ["--simple"], ["--columnar"], ["--ndjson"], ["--pretty"], ["--simple", "--pretty"]):
+            with self.subTest(options=options):
+                output = self.run_parser([rdb] + options)
+                self.assertIn(b"Infinity", output)
+                self.assertEqual(output, self.run_parser([rdb] + options, without_orjson=True))
+
+    def test_processes_same_as_serial(self):
+        # Several PARALLEL_CHUNK_BYTES ranges in each of the two DBs
+        rdb = self.write_rdb(dbs=2, keys_per_db=4000)
+        for options in (["--simple"], [], ["--columnar"]):
+            with self.subTest(options=options):
+                self.assertEqual(self.run_parser([rdb] + options + ["--processes=2"]),
+                                 self.run_parser([rdb] + options))
+
+    def test_processes_from_stdin_pipe(self):
+        # A pipe can't be reopened by the workers, so it is parsed serially
+        rdb = self.write_rdb(dbs=2, keys_per_db=4000)
+        with open(rdb, "rb") as f:
+            data = f.read()
+        expected = self.run_parser([rdb, "--simple"])
+        self.assertIn(b'"key:1:3999"', expected)
+        self.assertEqual(self.run_parser(["/dev/stdin", "--simple", "--processes=2"], input=data), expected)
+
+if __name__ == "__main__":
+    unittest.main()